@@ -1,54 +1,136 @@
-import time
+import argparse
+import logging
 import sys
-import cv2
-import pytesseract
 import subprocess
-from window_capture import get_window_bounds, capture_region_screenshot
+import metrics
+from frame_cache import Frame
+from pipeline import Pipeline
+from region_profiles import union, window_regions
+from screen_settle import wait_until_settled
+from window_capture import ScreenCapture, ReplayCapture, crop_region
 from word_search import (
     get_clue_words,
     get_puzzle_grid,
-    find_word_in_grid
+    find_words_in_grid
 )
 
-# If Tesseract is not in PATH, set it manually:
-pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"
+APP_NAME = "iPhone Mirroring"
+
+# Region profile (region_profiles.json) holding the clue and grid areas
+PROFILE = "word_search"
+REGIONS = ("clue", "grid")
+
+# Window position iPhone_Mirroring_window.png lines up with when replayed
+REPLAY_ORIGIN = (1167, 35)
+
+log = logging.getLogger("Main")
 
 def ensure_app_is_active(app_name: str) -> bool:
     script = f'tell application "{app_name}" to activate'
     proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
     return (proc.returncode == 0)
 
-def main():
-    if not ensure_app_is_active("iPhone Mirroring"):
-        print("❌ iPhone Mirroring not running or not active.")
-        sys.exit(1)
-    time.sleep(2)
+def read_clues(clue_image):
+    clue_words = get_clue_words(clue_image)
+    log.info("🔎 Clue Words: %s", clue_words)
+    return clue_words
+
+def read_grid(grid_image):
+    grid = get_puzzle_grid(grid_image)
+    if grid and log.isEnabledFor(logging.INFO):
+        log.info("🧩 Puzzle Grid for Search:\n%s", "\n".join(" | ".join(row) for row in grid))
+    return grid
+
+def solve_frame(frame, bounds, regions=None):
+    """
+    Reads and solves the puzzle in one frame (numpy image or Frame) grabbed at bounds.
+    regions gives the "clue" and "grid" screen rectangles; by default they are located
+    in the frame, which must then show the whole window.
+    Returns (clue words, grid, {word: matches}); grid is empty and matches None if OCR failed.
+    """
+    if regions is None:
+        regions = window_regions(bounds, PROFILE, grab_window=lambda: frame, required=REGIONS)
+    # Regions are ROI views of one Frame, so they share its grayscale/threshold work
+    frame = frame if isinstance(frame, Frame) else Frame(frame)
+    clue_image = crop_region(frame, bounds, *regions["clue"])
+    grid_image = crop_region(frame, bounds, *regions["grid"])
+
+    # Clue OCR and grid OCR are independent and run side by side;
+    # the search (one pass for every clue, one misread letter tolerated) waits for both
+    pipeline = Pipeline()
+    pipeline.stage("clues", lambda: read_clues(clue_image))
+    pipeline.stage("grid", lambda: read_grid(grid_image))
+    pipeline.stage("search", lambda clues, grid: find_words_in_grid(grid, clues, max_mismatches=1) if grid else None,
+                   depends=("clues", "grid"))
+    results = pipeline.run()
+    return results["clues"], results["grid"], results["search"]
 
-    bounds = get_window_bounds("iPhone Mirroring")
-    if not bounds:
-        print("❌ Could not get iPhone Mirroring window.")
-        sys.exit(1)
-    (win_x, win_y, win_w, win_h) = bounds
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solve the word search shown in iPhone Mirroring.")
+    parser.add_argument("--replay", nargs="+", metavar="FRAME",
+                        help="Read frames from saved screenshots (file, folder or glob) instead of the screen.")
+    parser.add_argument("--origin", default=",".join(map(str, REPLAY_ORIGIN)),
+                        help="Window x,y in screen points that replayed frames were captured at.")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="DEBUG adds per-cell search and raw OCR traces.")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Append per-turn timing spans and counters to PATH as JSON lines.")
+    return parser.parse_args(argv)
 
-    capture_region_screenshot(1181, 200, 316, 90, "crossword_region.png")
-    capture_region_screenshot(1181, 290, 316, 360, "crossword_search.png")
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    exporter = metrics.TurnExporter(args.metrics) if args.metrics else None
 
-    clue_words = get_clue_words("crossword_region.png")
-    print("🔎 Clue Words:", clue_words)
+    # Closed on every exit, including the sys.exit() error paths
+    try:
+        if args.replay:
+            backend = ReplayCapture(args.replay, origin=tuple(int(v) for v in args.origin.split(",")))
+        else:
+            if not ensure_app_is_active(APP_NAME):
+                log.error("❌ iPhone Mirroring not running or not active.")
+                sys.exit(1)
+            backend = ScreenCapture(APP_NAME)
 
-    grid = get_puzzle_grid("crossword_search.png")
-    if not grid:
-        print("❌ OCR failed to extract a puzzle grid.")
-        sys.exit(1)
+        bounds = backend.bounds()
+        if not bounds:
+            log.error("❌ Could not get iPhone Mirroring window.")
+            sys.exit(1)
 
-    print("\n🧩 Puzzle Grid for Search:")
-    for row in grid:
-        print(" | ".join(row))
+        if args.replay:
+            frame = backend.grab(bounds)
+            grab_window = lambda: frame
+        else:
+            # The whole window is only grabbed to localize the regions the first time this
+            # window size is seen; after that only the area covering them is captured
+            grab_window = lambda: backend.grab(bounds)
+        try:
+            regions = window_regions(bounds, PROFILE, grab_window=grab_window, required=REGIONS)
+        except ValueError as exc:
+            log.error("❌ %s", exc)
+            sys.exit(1)
 
-    for w in clue_words:
-        find_word_in_grid(grid, w)
+        if args.replay:
+            capture = bounds
+        else:
+            capture = union(regions.values())
+            # Wait for the regions to stop animating instead of a fixed sleep
+            _, frame, waited = wait_until_settled(lambda: backend.grab(capture), timeout=2.0)
+            log.info("🖼️ Window settled after %.2fs", waited)
+        if frame is None:
+            log.error("❌ Could not capture the iPhone Mirroring window.")
+            sys.exit(1)
+        clue_words, grid, found = solve_frame(frame, capture, regions)
+        if not grid:
+            log.error("❌ OCR failed to extract a puzzle grid.")
+            sys.exit(1)
 
-    print("✅ Word search complete.")
+        log.info("✅ Word search complete.")
+        if exporter:
+            exporter.end_turn(words=len(clue_words), found=sum(1 for m in found.values() if m))
+    finally:
+        if exporter:
+            exporter.close()
 
 if __name__ == "__main__":
     main()
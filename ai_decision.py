@@ -1,33 +1,67 @@
-def determine_best_score(dice_values, scoreboard_data):
-    """AI decision-making for selecting the best scoring category."""
-    
+import logging
+
+import numpy as np
+
+import metrics
+from game_state import CATEGORIES, NUM_CATEGORIES, GameState, score_options
+from yahtzee_solver import state_from_scoreboard, best_category
+from reroll_engine import decide_hold
+
+OPEN_BITS = 1 << np.arange(NUM_CATEGORIES)
+
+log = logging.getLogger(__name__)
+
+
+def greedy_best_score(dice_values, scoreboard_data):
+    """Greedy decision: the available category with the highest immediate points."""
+
     # Remove any 0 values before evaluating
     dice_values = [d for d in dice_values if d > 0]
 
-    score_options = {
-        "ones": dice_values.count(1) * 1,
-        "twos": dice_values.count(2) * 2,
-        "threes": dice_values.count(3) * 3,
-        "fours": dice_values.count(4) * 4,
-        "fives": dice_values.count(5) * 5,
-        "sixes": dice_values.count(6) * 6,
-        "three_of_a_kind": sum(dice_values) if any(dice_values.count(d) >= 3 for d in set(dice_values)) else 0,
-        "four_of_a_kind": sum(dice_values) if any(dice_values.count(d) >= 4 for d in set(dice_values)) else 0,
-        "full_house": 25 if set(dice_values.count(d) for d in set(dice_values)) == {2, 3} else 0,
-        "small_straight": 30 if set(dice_values) >= {1, 2, 3, 4} or set(dice_values) >= {2, 3, 4, 5} or set(dice_values) >= {3, 4, 5, 6} else 0,
-        "large_straight": 40 if set(dice_values) == {1, 2, 3, 4, 5} or set(dice_values) == {2, 3, 4, 5, 6} else 0,
-        "yahtzee": 50 if len(set(dice_values)) == 1 else 0,
-        "chance": sum(dice_values),
-    }
-
-    # Remove categories that are already filled
-    available_scores = {k: v for k, v in score_options.items() if scoreboard_data.get(k) == "empty"}
-
-    if not available_scores:
+    state = scoreboard_data if isinstance(scoreboard_data, GameState) else GameState.from_scoreboard(scoreboard_data)
+
+    if state.open_mask == 0:
         return "chance"  # Default to "chance" if no good moves
 
-    best_category = max(available_scores, key=available_scores.get)
-    
-    print(f"🤖 AI Decision: Select {best_category} for {available_scores[best_category]} points")
-    
-    return best_category
+    # Filled categories are masked out so argmax only sees available ones
+    scores = np.where(OPEN_BITS & state.open_mask, score_options(dice_values), -1)
+    best = int(np.argmax(scores))
+
+    log.info("🤖 AI Decision: Select %s for %d points", CATEGORIES[best], scores[best])
+
+    return CATEGORIES[best]
+
+
+@metrics.timed("decision")
+def determine_best_score(dice_values, scoreboard_data):
+    """AI decision-making for selecting the best scoring category (optimal expected score)."""
+
+    # Remove any 0 values before evaluating
+    dice_values = [d for d in dice_values if d > 0]
+
+    open_mask, upper, bonus = state_from_scoreboard(scoreboard_data)
+
+    # The solver needs five dice and at least one open box; otherwise score greedily.
+    if len(dice_values) != 5 or open_mask == 0:
+        return greedy_best_score(dice_values, scoreboard_data)
+
+    category, expected = best_category(dice_values, open_mask, upper, bonus)
+
+    log.info("🤖 AI Decision: Select %s (expected final %.1f points)", category, expected)
+
+    return category
+
+
+@metrics.timed("decision")
+def determine_dice_to_hold(dice_values, rolls_left, scoreboard_data):
+    """AI decision-making for which dice to keep before the next roll."""
+    if len(dice_values) != 5 or 0 in dice_values or rolls_left <= 0:
+        return [True] * len(dice_values)
+
+    hold = decide_hold(dice_values, rolls_left, scoreboard_data)
+
+    if log.isEnabledFor(logging.INFO):
+        kept = [d for d, h in zip(dice_values, hold) if h]
+        log.info("🤖 AI Decision: Hold %s with %d roll(s) left", kept, rolls_left)
+
+    return hold
@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Offline batch processing of recorded sessions: streams a folder (or glob) of
+# screenshots through one pipeline on a process pool and appends one JSON line
+# per frame as soon as it is done. Only max_in_flight frames are queued at a
+# time, so memory stays flat however long the session; --resume skips frames
+# that already have a successful line in the output.
+# Each worker is single-threaded (one stage thread, one OpenMP thread in
+# Tesseract): the processes are the parallelism, N of them on N cores.
+
+import pipeline
+from Main import REPLAY_ORIGIN, solve_frame
+from dice_recognition import recognize_dice
+from object_detection import find_objects
+from score_analysis import extract_game_state
+from window_capture import frame_bounds, list_frames, read_image
+
+log = logging.getLogger(__name__)
+
+
+def word_search_frame(image, origin=REPLAY_ORIGIN):
+    clues, grid, found = solve_frame(image, frame_bounds(image.shape, origin))
+    return {
+        "clues": clues,
+        "grid": grid,
+        "found": {w: [list(p) for p in matches[0].positions] if matches else None
+                  for w, matches in (found or {}).items()},
+    }
+
+def dice_frame(image, origin=None):
+    return {"dice": [[int(value), round(float(conf), 3)] for value, conf in recognize_dice(image)]}
+
+def scoreboard_frame(image, origin=None):
+    return {"scoreboard": extract_game_state(image).to_scoreboard()}
+
+def objects_frame(image, origin=None):
+    _, boxes = find_objects(image)
+    return {"objects": boxes.tolist()}
+
+PIPELINES = {
+    "word_search": word_search_frame,
+    "dice": dice_frame,
+    "scoreboard": scoreboard_frame,
+    "objects": objects_frame,
+}
+
+
+def _init_worker(log_level: str):
+    logging.basicConfig(level=log_level, format="%(message)s")
+    pipeline.set_shared_workers(1)
+
+@contextlib.contextmanager
+def _worker_environment(**variables):
+    """
+    Sets environment variables for the processes spawned inside the block, then restores the caller's.
+    Tesseract's OpenMP runtime reads its thread limit when the library loads, which in a spawned
+    worker happens while it re-imports the modules, before any initializer runs.
+    """
+    saved = {name: os.environ.get(name) for name in variables}
+    os.environ.update({name: value for name, value in variables.items() if saved[name] is None})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+
+def _process(task: str, path: str, origin) -> dict:
+    """Process-pool entry point: one frame -> one result record (errors are recorded, not raised)."""
+    start = time.perf_counter()
+    try:
+        image = read_image(path)
+        if image is None:
+            raise ValueError("could not read image")
+        record = {"path": path, "ok": True, **PIPELINES[task](image, origin)}
+    except Exception as exc:
+        record = {"path": path, "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+
+def trim_torn_line(output: str):
+    """Cuts off a partially written last line (a run killed mid-write) so appends start on a fresh line."""
+    if not os.path.exists(output):
+        return
+    with open(output, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+def completed_paths(output: str) -> set:
+    """Frames with a successful line in an existing output file (a torn last line is ignored)."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("ok"):
+                done.add(record["path"])
+    return done
+
+
+def run_batch(task: str, sources, output: str, workers: int = None, max_in_flight: int = None,
+              resume: bool = False, origin=REPLAY_ORIGIN, log_level: str = "WARNING"):
+    """
+    Processes every frame in sources with PIPELINES[task], appending records to output.
+    Returns (frames processed, failures, elapsed seconds).
+    """
+    paths = [os.path.abspath(p) for p in list_frames(sources)]
+    if resume:
+        trim_torn_line(output)
+        done = completed_paths(output)
+        paths = [p for p in paths if p not in done]
+        log.info("⏭️ Resuming: %d frames already done", len(done))
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    context = multiprocessing.get_context("spawn")
+
+    processed = failures = 0
+    start = time.perf_counter()
+    # Append mode + one flushed line per frame: an interrupted run leaves complete lines behind
+    with open(output, "a" if resume else "w", buffering=1) as out, \
+            _worker_environment(OMP_THREAD_LIMIT="1"), \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                initargs=(log_level,)) as pool:
+        queue = iter(paths)
+        running = set()
+        while True:
+            for path in queue:
+                running.add(pool.submit(_process, task, path, origin))
+                if len(running) >= max_in_flight:
+                    break
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                processed += 1
+                failures += not record["ok"]
+                if not record["ok"]:
+                    log.warning("❌ %s: %s", record["path"], record["error"])
+    return processed, failures, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a pipeline over recorded screenshots on a process pool.")
+    parser.add_argument("pipeline", choices=sorted(PIPELINES))
+    parser.add_argument("sources", nargs="+", help="Screenshot files, folders or glob patterns.")
+    parser.add_argument("--output", "-o", default="batch_results.jsonl", help="JSON Lines output file.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core).")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Frames queued at once (default: twice the workers).")
+    parser.add_argument("--resume", action="store_true", help="Skip frames already done in --output.")
+    parser.add_argument("--origin", default=",".join(map(str, REPLAY_ORIGIN)),
+                        help="Window x,y in screen points the frames were captured at (word_search).")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+
+    processed, failures, elapsed = run_batch(
+        args.pipeline, args.sources, args.output, args.workers, args.max_in_flight, args.resume,
+        tuple(int(v) for v in args.origin.split(",")), args.log_level,
+    )
+    rate = processed / elapsed if elapsed > 0 else float("inf")
+    print(f"📦 {args.pipeline}: {processed} frames in {elapsed:.2f}s ({rate:.1f} frames/s), "
+          f"{failures} failed -> {args.output}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
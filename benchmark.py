@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import ocr_engine
+from dice_recognition import recognize_dice
+from frame_cache import Frame
+from object_detection import find_objects
+from pipeline import Pipeline
+from score_analysis import ScoreboardReader
+from synthetic import render_dice, render_scoreboard, scaled
+from window_capture import crop_region
+from word_search import find_words_in_grid, get_clue_words, get_puzzle_grid
+
+# Per-stage benchmark over the committed screenshots and scaled-up copies of them.
+#
+# Every stage runs cold (fresh arrays, empty OCR cache) so the numbers are the
+# work a new frame costs. Runs offline: no screen capture, no window lookup.
+# Stages that need Tesseract are skipped when it is not installed.
+
+BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.25    # fail when a stage gets this much slower (or bigger) than its baseline
+MIN_SLACK_MS = 1.0          # ...and by at least this many milliseconds
+MIN_SLACK_MB = 1.0          # ...or megabytes, so tiny stages don't fail on noise
+
+CLUE_FIXTURE = "crossword_region.png"
+GRID_FIXTURES = ["crossword_search.png"]
+HIGHLIGHTED_FIXTURE = "crossword_search_highlighted.png"  # grid under highlight pills: get_puzzle_grid rejects it
+WINDOW_FIXTURE = "iPhone_Mirroring_window.png"
+OBJECT_FIXTURES = [CLUE_FIXTURE] + GRID_FIXTURES + [HIGHLIGHTED_FIXTURE, WINDOW_FIXTURE]
+
+# Where the clue list and the grid sit in WINDOW_FIXTURE (Main's regions, replayed at REPLAY_ORIGIN)
+WINDOW_BOUNDS = (1167, 35, 344, 764)
+CLUE_REGION = (1181, 200, 316, 90)
+GRID_REGION = (1181, 290, 316, 360)
+
+def ocr_available() -> bool:
+    """True if Tesseract (tesserocr or the binary) can be called."""
+    try:
+        ocr_engine.image_to_string(np.full((16, 16), 255, np.uint8))
+        return True
+    except Exception:
+        return False
+
+# -------------------------------------------------------
+# Stages: each case is (name, needs_ocr, prepare) where prepare() returns a
+# zero-argument callable doing one cold run of the stage.
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_fixture(name: str) -> np.ndarray:
+    image = cv2.imread(os.path.join(FIXTURE_DIR, name))
+    if image is None:
+        raise FileNotFoundError(name)
+    return image
+
+def stage_cases(scales):
+    cases = []
+    for scale in scales:
+        tag = f"@{scale}x"
+
+        def clue_ocr(scale=scale):
+            image = scaled(load_fixture(CLUE_FIXTURE), scale)
+            return lambda: get_clue_words(image.copy())
+        cases.append((f"clue_ocr[{CLUE_FIXTURE}{tag}]", True, clue_ocr))
+
+        for fixture in GRID_FIXTURES:
+            def grid_ocr(fixture=fixture, scale=scale):
+                image = scaled(load_fixture(fixture), scale)
+                return lambda: get_puzzle_grid(image.copy())
+            cases.append((f"grid_ocr[{fixture}{tag}]", True, grid_ocr))
+
+        def end_to_end(scale=scale):
+            window = scaled(load_fixture(WINDOW_FIXTURE), scale)
+            def run():
+                # Same stage graph as Main: clue and grid OCR concurrently, then the search
+                frame = Frame(window.copy())
+                pipeline = Pipeline()
+                pipeline.stage("clues", lambda: get_clue_words(crop_region(frame, WINDOW_BOUNDS, *CLUE_REGION)))
+                pipeline.stage("grid", lambda: get_puzzle_grid(crop_region(frame, WINDOW_BOUNDS, *GRID_REGION)))
+                pipeline.stage("search", lambda clues, grid: find_words_in_grid(grid, clues, max_mismatches=1),
+                               depends=("clues", "grid"))
+                return pipeline.run()["search"]
+            return run
+        cases.append((f"end_to_end[{WINDOW_FIXTURE}{tag}]", True, end_to_end))
+
+        def word_search(scale=scale):
+            # The recognized grid tiled scale x scale times
+            window = load_fixture(WINDOW_FIXTURE)
+            frame = Frame(window)
+            words = get_clue_words(crop_region(frame, WINDOW_BOUNDS, *CLUE_REGION))
+            grid = get_puzzle_grid(crop_region(frame, WINDOW_BOUNDS, *GRID_REGION))
+            grid = np.tile(np.array(grid), (scale, scale)).tolist()
+            return lambda: find_words_in_grid(grid, words, max_mismatches=1)
+        cases.append((f"word_search[{WINDOW_FIXTURE}{tag}]", True, word_search))
+
+        for fixture in OBJECT_FIXTURES:
+            def objects(fixture=fixture, scale=scale):
+                image = scaled(load_fixture(fixture), scale)
+                return lambda: find_objects(image.copy())
+            cases.append((f"object_detection[{fixture}{tag}]", False, objects))
+
+        def dice(scale=scale):
+            image = render_dice([5, 4, 6, 2, 2], scale)
+            return lambda: recognize_dice(image.copy())
+        cases.append((f"dice_recognition[synthetic{tag}]", False, dice))
+
+        def scoreboard(scale=scale):
+            # Calibrated once; each run reads a board where one score changed since the last turn
+            boards = [render_scoreboard([3, None, 12, None, None, 24, None, None, 25, None, 40, None, 22], scale),
+                      render_scoreboard([3, 8, 12, None, None, 24, None, None, 25, None, 40, None, 22], scale)]
+            reader = ScoreboardReader(os.path.join(tempfile.mkdtemp(), "layout.json"))
+            reader.read(boards[0])
+            turn = iter(range(1 << 30))
+            return lambda: reader.read(boards[next(turn) % 2].copy())
+        cases.append((f"scoreboard[synthetic{tag}]", True, scoreboard))
+    return cases
+
+# -------------------------------------------------------
+
+def measure(run, repeat: int) -> dict:
+    """Latency percentiles over repeat cold runs, plus peak traced memory of one extra run."""
+    ocr_engine.cache.clear()
+    run()  # warm-up: imports, templates, Tesseract engines
+
+    times = []
+    for _ in range(repeat):
+        ocr_engine.cache.clear()
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+
+    ocr_engine.cache.clear()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(float(np.percentile(times, 50)), 3),
+        "p95_ms": round(float(np.percentile(times, 95)), 3),
+        "peak_mb": round(peak / 2**20, 3),
+        "runs": repeat,
+    }
+
+def run_benchmarks(scales=(1, 2), repeat: int = 7, only=None) -> dict:
+    """Runs every stage case (optionally only names containing one of only) and returns the results."""
+    has_ocr = ocr_available()
+    results = {}
+    for name, needs_ocr, prepare in stage_cases(scales):
+        if only and not any(part in name for part in only):
+            continue
+        if needs_ocr and not has_ocr:
+            print(f"⏭️ {name}: skipped (no Tesseract)")
+            continue
+        results[name] = stats = measure(prepare(), repeat)
+        print(f"⏱️ {name:<58} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+              f"peak {stats['peak_mb']:7.2f} MB")
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "opencv": cv2.__version__, "ocr": has_ocr, "repeat": repeat, "scales": list(scales)},
+        "stages": results,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD):
+    """
+    Stages slower (p50) or bigger (peak memory) than baseline by more than threshold and the absolute slack.
+    p95 is reported but not gated: a handful of runs makes it too noisy.
+    """
+    regressions = []
+    for name, stats in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        for metric, slack in (("p50_ms", MIN_SLACK_MS), ("peak_mb", MIN_SLACK_MB)):
+            limit = base[metric] * (1 + threshold) + slack
+            if stats[metric] > limit:
+                regressions.append(f"{name} {metric}: {stats[metric]:.2f} > {limit:.2f} (baseline {base[metric]:.2f})")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage latency/memory benchmark over the committed screenshots.")
+    parser.add_argument("--scales", default="1,2", help="Comma-separated upscale factors of the fixtures.")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs per stage.")
+    parser.add_argument("--stage", action="append", help="Only run stages whose name contains this (repeatable).")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against / save to.")
+    parser.add_argument("--save", action="store_true", help="Save these results as the new baseline.")
+    parser.add_argument("--output", help="Also write the results JSON here.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed fractional regression before failing.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(tuple(int(s) for s in args.scales.split(",")), args.repeat, args.stage)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    if not regressions:
+        print(f"✅ No stage regressed more than {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
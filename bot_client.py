@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Thin client for bot_daemon: no OpenCV, no Tesseract, just a socket.
+# Start-up is a bare Python interpreter; each reply reports the daemon's own
+# elapsed_ms next to the client's round trip.
+
+# Same default as bot_daemon: a socket inside a per-user, owner-only directory
+SOCKET_PATH = os.environ.get("BOT_SOCKET", os.path.join(tempfile.gettempdir(), f"yahtzee_bot-{os.getuid()}", "bot.sock"))
+
+
+class BotClient:
+    """One connection to the daemon; call() sends a request and returns its reply dict."""
+
+    def __init__(self, path: str = SOCKET_PATH, timeout: float = 30.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.reader = self.sock.makefile("rb")
+
+    def call(self, op: str, array=None, **fields) -> dict:
+        """
+        Sends {"op": op, **fields}; a numpy array is streamed raw after the request line.
+        The reply gets "round_trip_ms" added next to the daemon's "elapsed_ms".
+        """
+        request = {"op": op, **fields}
+        data = b""
+        if array is not None:
+            request["array"] = {"shape": list(array.shape), "dtype": str(array.dtype)}
+            data = array.tobytes()
+        start = time.perf_counter()
+        self.sock.sendall(json.dumps(request).encode() + b"\n" + data)
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        reply = json.loads(line)
+        reply["round_trip_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return reply
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Send one request to a running bot_daemon.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path (or set BOT_SOCKET).")
+    parser.add_argument("--repeat", type=int, default=1, help="Send the request this many times (latency check).")
+    commands = parser.add_subparsers(dest="op", required=True)
+
+    solve = commands.add_parser("solve", help="Solve the word search in a window screenshot.")
+    solve.add_argument("path")
+    solve.add_argument("--origin", help="Window x,y in screen points the screenshot was taken at.")
+
+    decide = commands.add_parser("decide", help="Decide which dice to hold, or which category to score.")
+    dice = decide.add_mutually_exclusive_group(required=True)
+    dice.add_argument("--dice", type=int, nargs=5)
+    dice.add_argument("--dice-image")
+    board = decide.add_mutually_exclusive_group(required=True)
+    board.add_argument("--scoreboard", help="Scoreboard JSON file ({category: score or 'empty'}).")
+    board.add_argument("--scoreboard-image")
+    decide.add_argument("--rolls-left", type=int, default=0)
+
+    detect = commands.add_parser("detect", help="Detect objects in an image.")
+    detect.add_argument("path")
+    detect.add_argument("--output", choices=["png", "atlas"],
+                        help="Persist new objects (default: don't; the daemon must be started with --objects-dir).")
+
+    for name in ("ping", "stats", "shutdown"):
+        commands.add_parser(name)
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def build_request(args) -> tuple:
+    """CLI arguments -> (op, fields)."""
+    if args.op == "solve":
+        fields = {"path": os.path.abspath(args.path)}
+        if args.origin:
+            fields["origin"] = [int(v) for v in args.origin.split(",")]
+        return "solve_frame", fields
+    if args.op == "decide":
+        fields = {"rolls_left": args.rolls_left}
+        if args.dice:
+            fields["dice"] = args.dice
+        else:
+            fields["dice_image"] = os.path.abspath(args.dice_image)
+        if args.scoreboard:
+            with open(args.scoreboard) as f:
+                fields["scoreboard"] = json.load(f)
+        else:
+            fields["scoreboard_image"] = os.path.abspath(args.scoreboard_image)
+        return "decide_turn", fields
+    if args.op == "detect":
+        return "detect_objects", {"path": os.path.abspath(args.path), "output": args.output}
+    return args.op, {}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    op, fields = build_request(args)
+    try:
+        client = BotClient(args.socket)
+    except OSError as exc:
+        print(f"❌ No bot daemon on {args.socket} ({exc}); start it with: python3 bot_daemon.py")
+        return 1
+
+    with client:
+        for _ in range(args.repeat):
+            reply = client.call(op, **fields)
+            print(json.dumps(reply))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+import ocr_engine
+from ai_decision import determine_best_score, determine_dice_to_hold
+from dice_recognition import recognize_dice
+from Main import REPLAY_ORIGIN, solve_frame
+from object_detection import detect_objects
+from pipeline import DEFAULT_WORKERS, shared_executor
+from score_analysis import DIGITS_CONFIG, ScoreboardReader, extract_game_state
+from window_capture import frame_bounds, read_image
+from word_search import LETTER_CONFIG, SINGLE_LETTER_CONFIG
+from yahtzee_solver import load_values
+
+# Long-running bot process with everything warm: OCR engines, the OCR cache,
+# the scoreboard layout, dice templates and the solver's value table.
+#
+# Protocol (local Unix socket): one JSON request per line, one JSON reply per line.
+# A request may carry a raw image right after its line ("array": {"shape", "dtype"});
+# otherwise images are given as file paths. Every reply has "ok" and the
+# server-side "elapsed_ms", so request latency is measured without process start-up.
+# The socket lives in a per-user 0700 directory and is itself 0600, so only the
+# user running the daemon can send requests. Object output is off unless the
+# daemon is started with --objects-dir.
+#
+#   {"op": "ping"}
+#   {"op": "solve_frame", "path": "shot.png", "origin": [x, y]}
+#   {"op": "decide_turn", "dice": [..] | "dice_image": path, "rolls_left": n,
+#                         "scoreboard": {..} | "scoreboard_image": path}
+#   {"op": "detect_objects", "path": "shot.png", "output": null | "png" | "atlas"}
+#   {"op": "stats"}   {"op": "shutdown"}
+
+SOCKET_PATH = os.environ.get("BOT_SOCKET", os.path.join(tempfile.gettempdir(), f"yahtzee_bot-{os.getuid()}", "bot.sock"))
+REQUEST_WORKERS = 4
+WARM_TIMEOUT = 5.0  # seconds the warm-up waits for every pool thread to pick up a task
+# Engines each pool needs: word search runs on the stage pool, scoreboard reads on the request pool
+STAGE_OCR_CONFIGS = ["", LETTER_CONFIG, SINGLE_LETTER_CONFIG]
+REQUEST_OCR_CONFIGS = [DIGITS_CONFIG]
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _warm_pool(executor, workers: int, configs):
+    """
+    Starts an engine per config on each of the pool's threads. The barrier keeps the tasks on
+    separate threads; if the pool has fewer than workers threads it times out (instead of
+    deadlocking) and the threads that do exist are still warmed.
+    """
+    barrier = threading.Barrier(workers, timeout=WARM_TIMEOUT)
+
+    def warm(_):
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        ocr_engine.warm_up(configs)
+
+    list(executor.map(warm, range(workers)))
+    if barrier.broken:
+        log.warning("⚠️ Pool has fewer than %d threads; warm-up waited %.0fs", workers, WARM_TIMEOUT)
+
+
+def warm_up(request_pool):
+    """Loads the value table and starts the OCR engines of both pools before the first request."""
+    load_values()
+    try:
+        _warm_pool(shared_executor(), DEFAULT_WORKERS, STAGE_OCR_CONFIGS)
+        _warm_pool(request_pool, REQUEST_WORKERS, REQUEST_OCR_CONFIGS)
+    except Exception as exc:
+        log.warning("⚠️ OCR not available: %s", exc)
+
+
+def _scoreboard_reader() -> ScoreboardReader:
+    """This request thread's scoreboard reader (readers keep per-stream state and are not thread-safe)."""
+    reader = getattr(_local, "reader", None)
+    if reader is None:
+        reader = _local.reader = ScoreboardReader()
+    return reader
+
+
+def _image(request, payload):
+    """The request's image: the raw array sent with it, or the file at request["path"]."""
+    if payload is not None:
+        return payload
+    image = read_image(request["path"])
+    if image is None:
+        raise FileNotFoundError(request["path"])
+    return image
+
+
+def solve(request, payload):
+    frame = _image(request, payload)
+    bounds = request.get("bounds") or frame_bounds(frame.shape, request.get("origin", REPLAY_ORIGIN))
+    clues, grid, found = solve_frame(frame, bounds)
+    return {
+        "clues": clues,
+        "grid": grid,
+        "found": {w: [list(p) for p in matches[0].positions] if matches else None
+                  for w, matches in (found or {}).items()},
+    }
+
+
+def decide(request, payload):
+    dice = request.get("dice")
+    if dice is None:
+        dice = [value for value, _ in recognize_dice(_image({"path": request["dice_image"]}, payload))]
+    scoreboard = request.get("scoreboard")
+    if scoreboard is None:
+        scoreboard = extract_game_state(request["scoreboard_image"], _scoreboard_reader())
+    rolls_left = int(request.get("rolls_left", 0))
+    reply = {"dice": dice, "rolls_left": rolls_left}
+    if rolls_left > 0:
+        reply["hold"] = determine_dice_to_hold(dice, rolls_left, scoreboard)
+    else:
+        reply["category"] = determine_best_score(dice, scoreboard)
+    return reply
+
+
+def detect(request, payload, objects_folder=None):
+    """Writes new objects (output "png" or "atlas") only into objects_folder, and only if one is configured."""
+    output = request.get("output")
+    if output is None:
+        positions, _ = detect_objects(_image(request, payload), output=None)
+    elif objects_folder is None:
+        raise PermissionError("Object output is disabled; start the daemon with --objects-dir")
+    else:
+        positions, _ = detect_objects(_image(request, payload), output=output, folder=objects_folder,
+                                      atlas_path=os.path.join(objects_folder, "atlas.npz"))
+    return {"objects": {name: list(box) for name, box in positions.items()}}
+
+
+def _private_dir(path: str):
+    """Creates the socket's directory owner-only (0700), or checks an existing one is."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be owned by this user and not accessible to others (chmod 700)")
+
+
+def _remove_stale_socket(path: str):
+    """Removes a socket left behind by a daemon that is gone; refuses anything else."""
+    if not os.path.lexists(path):
+        return
+    if not stat.S_ISSOCK(os.lstat(path).st_mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)  # nobody listening
+    else:
+        raise OSError(f"A bot daemon is already running on {path}")
+    finally:
+        probe.close()
+
+
+class BotServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix-socket server. Requests run on a persistent request pool (warm OCR engines per thread);
+    solve_frame fans out further onto the pipeline's stage pool, which never waits on requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str = SOCKET_PATH, workers=None, objects_folder: str = None):
+        self.path = path
+        self.inode = None  # (device, inode) of the socket this process bound, the only one it removes
+        _private_dir(os.path.dirname(os.path.abspath(path)))
+        _remove_stale_socket(path)
+        super().__init__(path, BotHandler)
+        self.workers = workers or ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix="request")
+        self.objects_folder = objects_folder
+        self.started = time.time()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self.ops = {"solve_frame": solve, "decide_turn": decide,
+                    "detect_objects": lambda request, payload: detect(request, payload, self.objects_folder),
+                    "ping": lambda request, payload: {"uptime": time.time() - self.started},
+                    "stats": lambda request, payload: self.stats()}
+
+    def server_bind(self):
+        # Owner-only from the moment it exists
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        info = os.stat(self.server_address)
+        self.inode = (info.st_dev, info.st_ino)
+
+    def stats(self):
+        with self._requests_lock:
+            requests = self.requests
+        return {"requests": requests, "uptime": time.time() - self.started,
+                "ocr_cache": ocr_engine.cache_stats(), **metrics.snapshot()}
+
+    def handle_request_line(self, request: dict, payload):
+        op = request.get("op")
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}
+        if op not in self.ops:
+            raise ValueError(f"Unknown op {op!r}")
+        with self._requests_lock:
+            self.requests += 1
+        with metrics.span(f"request.{op}"):
+            return self.workers.submit(self.ops[op], request, payload).result()
+
+    def server_close(self):
+        super().server_close()
+        self.workers.shutdown(wait=False)
+        # Only the socket this process created; another daemon may have replaced it since
+        try:
+            info = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.S_ISSOCK(info.st_mode) and (info.st_dev, info.st_ino) == self.inode:
+            os.remove(self.path)
+
+
+class BotHandler(socketserver.StreamRequestHandler):
+    """One client connection: any number of newline-delimited requests."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            start = time.perf_counter()
+            request = {}
+            try:
+                request = json.loads(line)
+                payload = None
+                if "array" in request:
+                    spec = request["array"]
+                    dtype = np.dtype(spec["dtype"])
+                    size = int(np.prod(spec["shape"])) * dtype.itemsize
+                    payload = np.frombuffer(self.rfile.read(size), dtype=dtype).reshape(spec["shape"])
+                reply = {"ok": True, **self.server.handle_request_line(request, payload)}
+            except Exception as exc:
+                log.exception("❌ Request failed")
+                reply = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            reply["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            log.info("📨 %s in %.1f ms", request.get("op"), reply["elapsed_ms"])
+            self.wfile.write((json.dumps(reply, default=_json_default) + "\n").encode())
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the bot warm and serve requests on a Unix socket.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path (or set BOT_SOCKET).")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--metrics", action="store_true", help="Collect timing spans (returned by the stats op).")
+    parser.add_argument("--objects-dir", metavar="PATH",
+                        help="Allow detect_objects to write png/atlas output, into PATH only (default: refused).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    metrics.enable(args.metrics)
+
+    start = time.perf_counter()
+    workers = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix="request")
+    warm_up(workers)
+    server = BotServer(args.socket, workers, args.objects_dir)
+    log.info("🟢 Bot daemon ready on %s (warm-up %.2fs)", args.socket, time.perf_counter() - start)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        log.info("🛑 Bot daemon stopped")
+
+
+if __name__ == "__main__":
+    main()
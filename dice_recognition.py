@@ -1,35 +1,133 @@
+import logging
+import os
 import cv2
-import pytesseract
 import numpy as np
 
-# Ensure Tesseract is found by Python
-pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"  # Update path if needed
+import metrics
+from frame_cache import as_frame, preprocess_image
+from window_capture import read_image
 
-def preprocess_image(image):
-    """Enhances the image for OCR by converting to grayscale and thresholding."""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-    return thresh
+# Optional reference faces: DiceTemplates/die_1.png ... die_6.png
+DICE_TEMPLATES_FOLDER = "DiceTemplates"
+NUM_DICE = 5
+TEMPLATE_SIZE = (48, 48)
+
+# Slots with less grey-level spread than this are treated as empty
+EMPTY_SLOT_STD = 12.0
+
+log = logging.getLogger(__name__)
+
+def split_slots(binary: np.ndarray, count: int = NUM_DICE):
+    """Splits the roll area into equal-width slots, one per die (views, no copies)."""
+    width = binary.shape[1]
+    edges = np.linspace(0, width, count + 1).astype(int)
+    return [binary[:, edges[i]:edges[i + 1]] for i in range(count)]
+
+def count_pips(slot: np.ndarray):
+    """
+    Counts pip blobs in one thresholded slot (pips are white on black).
+    Returns (value, confidence); value 0 means no readable die.
+    """
+    num, _, stats, _ = cv2.connectedComponentsWithStats(slot, connectivity=8)
+    if num <= 1:
+        return 0, 0.0
+
+    slot_area = slot.shape[0] * slot.shape[1]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    w = stats[1:, cv2.CC_STAT_WIDTH]
+    h = stats[1:, cv2.CC_STAT_HEIGHT]
+
+    # Pips are small, filled and roughly round
+    fill = areas / np.maximum(w * h, 1)
+    aspect = w / np.maximum(h, 1)
+    candidates = areas[
+        (areas > slot_area * 0.002) & (areas < slot_area * 0.08)
+        & (fill > 0.5) & (aspect > 0.6) & (aspect < 1.6)
+    ]
+    if len(candidates) == 0:
+        return 0, 0.0
+
+    # All pips on a face share one size; drop blobs far from the median
+    median = np.median(candidates)
+    pips = candidates[(candidates > median * 0.5) & (candidates < median * 2.0)]
+    value = len(pips)
+    if not 1 <= value <= 6:
+        return 0, 0.0
+
+    uniformity = 1.0 - min(pips.std() / pips.mean(), 1.0)
+    confidence = uniformity * len(pips) / len(candidates)
+    return value, float(confidence)
+
+def load_templates(folder: str = DICE_TEMPLATES_FOLDER):
+    """Loads reference die faces as {value: binary template}, or {} if none are saved."""
+    templates = {}
+    if not os.path.isdir(folder):
+        return templates
+    for value in range(1, 7):
+        path = os.path.join(folder, f"die_{value}.png")
+        image = cv2.imread(path)
+        if image is not None:
+            templates[value] = cv2.resize(preprocess_image(image), TEMPLATE_SIZE)
+    return templates
+
+def match_template(slot: np.ndarray, templates: dict):
+    """Classifies one thresholded slot against reference faces. Returns (value, confidence)."""
+    face = cv2.resize(slot, TEMPLATE_SIZE)
+    best_value, best_score = 0, 0.0
+    for value, template in templates.items():
+        score = float(cv2.matchTemplate(face, template, cv2.TM_CCOEFF_NORMED)[0, 0])
+        if score > best_score:
+            best_value, best_score = value, score
+    return best_value, best_score
+
+_templates = None
+
+@metrics.timed("detection.dice")
+def recognize_dice(image):
+    """
+    Reads all five dice from a BGR roll-area image (or Frame) in-process.
+    Returns a list of (value, confidence) per slot; empty slots are (0, confidence it is empty).
+    """
+    global _templates
+    if _templates is None:
+        _templates = load_templates()
+
+    frame = as_frame(image)
+    gray = frame.gray()
+    processed_image = preprocess_image(frame)
+
+    results = []
+    for gray_slot, slot in zip(split_slots(gray), split_slots(processed_image)):
+        if gray_slot.std() < EMPTY_SLOT_STD:
+            results.append((0, 1.0 - float(gray_slot.std()) / EMPTY_SLOT_STD))
+        elif _templates:
+            results.append(match_template(slot, _templates))
+        else:
+            results.append(count_pips(slot))
+    return results
 
 def extract_dice_values(image_path):
     """Detects and extracts the dice values from the roll area and identifies empty slots."""
-    
-    # Load the image
-    image = cv2.imread(image_path)
 
-    # ✅ Fix: Ensure `preprocess_image` is defined before calling it
-    processed_image = preprocess_image(image)
+    # Load the image (file path or numpy frame region)
+    image = read_image(image_path)
+    if image is None:
+        log.error("❌ Could not read image: %s", image_path)
+        return [0] * NUM_DICE
 
-    # Use Tesseract to extract text
-    custom_config = r'--oem 3 --psm 6 digits'
-    detected_text = pytesseract.image_to_string(processed_image, config=custom_config)
+    # Empty or unreadable slots come back as 0
+    dice_values = [value for value, _ in recognize_dice(image)]
 
-    # Extract dice values (only digits)
-    dice_values = [int(char) for char in detected_text if char.isdigit()]
+    log.info("🎲 Detected Dice Values (cleaned): %s", dice_values)
+    return dice_values
 
-    # Convert "empty" to 0
-    while len(dice_values) < 5:
-        dice_values.append(0)
+if __name__ == "__main__":
+    import sys
+    import time
 
-    print(f"🎲 Detected Dice Values (cleaned): {dice_values}")
-    return dice_values
+    for path in sys.argv[1:]:
+        image = cv2.imread(path)
+        start = time.perf_counter()
+        dice = recognize_dice(image)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🎲 {path}: {dice} ({elapsed:.2f} ms)")
@@ -1,16 +1,16 @@
+import logging
 import subprocess
 import time
 
+log = logging.getLogger(__name__)
+
 def bring_app_to_front(app_name):
     """Brings the specified application to the front."""
     script = f'tell application "{app_name}" to activate'
     subprocess.run(["osascript", "-e", script])
 
-def ensure_app_is_active(app_name):
-    """Brings the app to the front and verifies it's active."""
-    bring_app_to_front(app_name)
-    time.sleep(1)  # Give it a moment to actually come to the front
-
+def frontmost_app():
+    """Name of the application currently in front."""
     script = '''
     tell application "System Events"
         set frontApp to name of first application process whose frontmost is true
@@ -18,11 +18,21 @@ def ensure_app_is_active(app_name):
     return frontApp
     '''
     result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
-    active_app = result.stdout.strip()
+    return result.stdout.strip()
+
+def ensure_app_is_active(app_name, timeout=1.0, interval=0.05):
+    """Brings the app to the front and polls until it is active (or timeout seconds pass)."""
+    bring_app_to_front(app_name)
+
+    deadline = time.monotonic() + timeout
+    active_app = frontmost_app()
+    while active_app != app_name and time.monotonic() < deadline:
+        time.sleep(interval)
+        active_app = frontmost_app()
 
     if active_app == app_name:
-        print(f"✅ {app_name} is now active.")
+        log.info("✅ %s is now active.", app_name)
         return True
     else:
-        print(f"❌ Failed to bring {app_name} to the front. Current active app: {active_app}")
+        log.error("❌ Failed to bring %s to the front. Current active app: %s", app_name, active_app)
         return False
@@ -0,0 +1,142 @@
+import threading
+
+import cv2
+import numpy as np
+
+import metrics
+
+# Shared per-frame preprocessing.
+#
+# A Frame wraps one captured BGR image and computes derived images (grayscale,
+# thresholds, edges, morphology) on first request, keyed by operation and
+# parameters, so every detector reading the same capture shares the work.
+# ROI views slice pixel-wise results out of the root frame (an ROI of an ROI
+# still hangs off the whole capture); neighbourhood operations are computed on
+# the ROI itself. update() swaps in the next
+# capture and reuses the previous frame's arrays as output buffers.
+# Stages running on different threads may share a Frame: each result is
+# computed once under the frame's lock.
+
+
+class Frame:
+    """Lazily memoized derived images of one BGR capture (or an ROI of one)."""
+
+    def __init__(self, image: np.ndarray, parent=None, rect=None):
+        self.image = image
+        self.parent = parent
+        self.rect = rect          # (x, y, w, h) inside parent, for ROI views
+        self._cache = {}
+        self._buffers = {}
+        self._rois = {}
+        self._lock = threading.RLock()
+
+    def update(self, image: np.ndarray):
+        """
+        Moves on to the next capture, keeping old results as reusable output buffers.
+        Arrays returned for the previous capture may be overwritten by the next one.
+        """
+        # Views (ROI slices, the capture itself) are never recycled
+        self._buffers.update({k: v for k, v in self._cache.items() if v.base is None and v is not self.image})
+        self._cache = {}
+        self._rois = {}
+        self.image = image
+        return self
+
+    def _slice_parent(self, key, compute):
+        """Pixel-wise results of an ROI are views into the root frame's result."""
+        x, y, w, h = self.rect
+        return self.parent.derive(key, compute, pointwise=True)[y:y + h, x:x + w]
+
+    def derive(self, key, compute, pointwise: bool = False):
+        """
+        Memoized derived image: compute(frame, dst) -> array, stored under key.
+        pointwise results of an ROI are sliced from the parent's (shared) result.
+        """
+        result = self._cache.get(key)
+        if result is not None:
+            metrics.count("frame_cache.hits")
+            return result
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                metrics.count("frame_cache.misses")
+                if pointwise and self.parent is not None:
+                    result = self._slice_parent(key, compute)
+                else:
+                    with metrics.span("preprocess"):
+                        result = compute(self, self._buffers.pop(key, None))
+                self._cache[key] = result
+        return result
+
+    def roi(self, x: int, y: int, w: int, h: int):
+        """Zero-copy sub-frame sharing the root frame's pixel-wise results."""
+        rect = (int(x), int(y), int(w), int(h))
+        with self._lock:
+            view = self._rois.get(rect)
+            if view is None:
+                # Parents are always roots: a nested ROI is re-based onto the whole capture
+                root, (dx, dy) = (self.parent, self.rect[:2]) if self.parent is not None else (self, (0, 0))
+                view = self._rois[rect] = Frame(self.image[y:y + h, x:x + w], parent=root,
+                                                rect=(dx + rect[0], dy + rect[1], rect[2], rect[3]))
+        return view
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    # --- common derived images -------------------------------------------
+
+    def gray(self) -> np.ndarray:
+        def compute(frame, dst):
+            if frame.image.ndim == 2:
+                return frame.image
+            code = cv2.COLOR_BGRA2GRAY if frame.image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            return cv2.cvtColor(frame.image, code, dst=dst)
+        return self.derive("gray", compute, pointwise=True)
+
+    def binary_inv(self, level: int = 150) -> np.ndarray:
+        """Pixels darker than level become 255 (THRESH_BINARY_INV)."""
+        def compute(frame, dst):
+            return cv2.threshold(frame.gray(), level, 255, cv2.THRESH_BINARY_INV, dst=dst)[1]
+        return self.derive(("binary_inv", level), compute, pointwise=True)
+
+    def below(self, level: int) -> np.ndarray:
+        """Mask (0/255) of pixels darker than level."""
+        return self.binary_inv(level - 1)
+
+    def above(self, level: int) -> np.ndarray:
+        """Mask (0/255) of pixels brighter than level."""
+        def compute(frame, dst):
+            return cv2.threshold(frame.gray(), level, 255, cv2.THRESH_BINARY, dst=dst)[1]
+        return self.derive(("above", level), compute, pointwise=True)
+
+    def adaptive(self, block_size: int = 11, c: int = 2) -> np.ndarray:
+        """Gaussian adaptive threshold, binary inverted."""
+        def compute(frame, dst):
+            return cv2.adaptiveThreshold(frame.gray(), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY_INV, block_size, c, dst=dst)
+        return self.derive(("adaptive", block_size, c), compute)
+
+    def canny(self, low: int = 30, high: int = 200) -> np.ndarray:
+        def compute(frame, dst):
+            return cv2.Canny(frame.gray(), low, high, edges=dst)
+        return self.derive(("canny", low, high), compute)
+
+    def morphology(self, source: str, op: int, ksize: int = 3, iterations: int = 1, **params) -> np.ndarray:
+        """Morphology (cv2.MORPH_*) applied to another derived image, e.g. morphology("adaptive", MORPH_OPEN)."""
+        def compute(frame, dst):
+            kernel = np.ones((ksize, ksize), np.uint8)
+            return cv2.morphologyEx(getattr(frame, source)(**params), op, kernel,
+                                    iterations=iterations, dst=dst)
+        key = ("morphology", source, op, ksize, iterations, tuple(sorted(params.items())))
+        return self.derive(key, compute)
+
+
+def as_frame(image) -> Frame:
+    """Wraps a numpy image in a Frame (Frames pass through unchanged)."""
+    return image if isinstance(image, Frame) else Frame(image)
+
+
+def preprocess_image(image, level: int = 150) -> np.ndarray:
+    """Grayscale + inverted threshold shared by the dice and scoreboard readers (memoized per Frame)."""
+    return as_frame(image).binary_inv(level)
@@ -0,0 +1,124 @@
+import itertools
+
+import numpy as np
+
+CATEGORIES = [
+    "ones", "twos", "threes", "fours", "fives", "sixes",
+    "three_of_a_kind", "four_of_a_kind", "full_house",
+    "small_straight", "large_straight", "yahtzee", "chance"
+]
+CATEGORY_INDEX = {name: c for c, name in enumerate(CATEGORIES)}
+NUM_CATEGORIES = len(CATEGORIES)
+ALL_OPEN = (1 << NUM_CATEGORIES) - 1
+EMPTY = -1
+
+# All 252 sorted five-dice rolls and their index.
+ROLLS = list(itertools.combinations_with_replacement(range(1, 7), 5))
+ROLL_INDEX = {roll: i for i, roll in enumerate(ROLLS)}
+
+
+def score_dice(dice, category: str) -> int:
+    """Score of a list of dice in a category (no joker rules)."""
+    dice = list(dice)
+    if not dice:
+        return 0
+    faces = set(dice)
+    counts = [dice.count(d) for d in faces]
+    if category in CATEGORIES[:6]:
+        face = CATEGORY_INDEX[category] + 1
+        return dice.count(face) * face
+    if category == "three_of_a_kind":
+        return sum(dice) if max(counts) >= 3 else 0
+    if category == "four_of_a_kind":
+        return sum(dice) if max(counts) >= 4 else 0
+    if category == "full_house":
+        return 25 if sorted(counts) == [2, 3] else 0
+    if category == "small_straight":
+        return 30 if faces >= {1, 2, 3, 4} or faces >= {2, 3, 4, 5} or faces >= {3, 4, 5, 6} else 0
+    if category == "large_straight":
+        return 40 if faces == {1, 2, 3, 4, 5} or faces == {2, 3, 4, 5, 6} else 0
+    if category == "yahtzee":
+        return 50 if len(faces) == 1 else 0
+    return sum(dice)
+
+
+# SCORE_TABLE[roll_index, category] for every sorted roll.
+SCORE_TABLE = np.array([[score_dice(r, c) for c in CATEGORIES] for r in ROLLS], dtype=np.int64)
+SCORE_TABLE.setflags(write=False)
+
+
+def roll_index(dice_values) -> int:
+    """Index of five dice in ROLLS, or EMPTY if there are not five valid dice."""
+    return ROLL_INDEX.get(tuple(sorted(dice_values)), EMPTY)
+
+
+def score_options(dice_values) -> np.ndarray:
+    """All 13 category scores for the dice; a single table row for a full roll."""
+    r = roll_index(dice_values)
+    if r != EMPTY:
+        return SCORE_TABLE[r]
+    return np.array([score_dice(dice_values, c) for c in CATEGORIES], dtype=np.int64)
+
+
+class GameState:
+    """
+    Compact game state shared by the OCR and decision layers.
+    open_mask: bit c set while category c is still available.
+    dice: index into ROLLS (EMPTY if unknown).
+    scores: int16 per category, EMPTY when not filled in.
+    """
+    __slots__ = ("open_mask", "dice", "scores")
+
+    def __init__(self, open_mask: int = ALL_OPEN, dice: int = EMPTY, scores=None):
+        self.open_mask = open_mask
+        self.dice = dice
+        self.scores = np.full(NUM_CATEGORIES, EMPTY, dtype=np.int16) if scores is None else scores
+
+    @classmethod
+    def from_scoreboard(cls, scoreboard_data: dict):
+        """Builds a state from an extract_scoreboard dict ("empty" or an int per category)."""
+        state = cls(open_mask=0)
+        for c, category in enumerate(CATEGORIES):
+            value = scoreboard_data.get(category)
+            if value == "empty":
+                state.open_mask |= 1 << c
+            elif isinstance(value, int):
+                state.scores[c] = value
+        return state
+
+    def to_scoreboard(self) -> dict:
+        """The extract_scoreboard dict view of this state."""
+        scoreboard = {}
+        for c, category in enumerate(CATEGORIES):
+            if self.open_mask >> c & 1:
+                scoreboard[category] = "empty"
+            elif self.scores[c] != EMPTY:
+                scoreboard[category] = int(self.scores[c])
+        return scoreboard
+
+    def is_open(self, category: int) -> bool:
+        return bool(self.open_mask >> category & 1)
+
+    def fill(self, category: int, points: int):
+        """Records points in a category and closes it."""
+        self.scores[category] = points
+        self.open_mask &= ~(1 << category)
+
+    def set_dice(self, dice_values):
+        self.dice = roll_index(dice_values)
+
+    @property
+    def dice_values(self):
+        return list(ROLLS[self.dice]) if self.dice != EMPTY else []
+
+    @property
+    def upper_subtotal(self) -> int:
+        upper = self.scores[:6]
+        return int(upper[upper != EMPTY].sum())
+
+    @property
+    def yahtzee_bonus(self) -> int:
+        return int(self.scores[CATEGORY_INDEX["yahtzee"]] == 50)
+
+    def __repr__(self):
+        return f"GameState(open_mask={self.open_mask:013b}, dice={self.dice_values}, scores={self.scores.tolist()})"
@@ -0,0 +1,119 @@
+import functools
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+# Hot-path instrumentation: timing spans and counters, collected per turn.
+#
+# Disabled by default; span() then hands back one shared no-op context manager
+# and count() returns after a single flag check. Span names used across the
+# bot: capture, preprocess, ocr, detection.<what>, search, decision.
+# Spans are inclusive (an "ocr" span inside "detection.grid" counts in both).
+
+_lock = threading.Lock()
+_enabled = False
+_spans = {}      # name -> [count, total seconds, max seconds]
+_counters = {}   # name -> int
+_NULL_SPAN = nullcontext()
+
+
+def enable(on: bool = True):
+    """Turns collection on (or off with on=False)."""
+    global _enabled
+    _enabled = on
+
+def enabled() -> bool:
+    return _enabled
+
+def _record(name: str, seconds: float):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            _spans[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name: str):
+    """Context manager timing the enclosed block under name (no-op while disabled)."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name: str, n: int = 1):
+    """Adds n to counter name (no-op while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def snapshot(reset: bool = False) -> dict:
+    """Spans (count, total_ms, max_ms) and counters collected so far; reset starts a new turn."""
+    with _lock:
+        spans = {name: {"count": c, "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                 for name, (c, total, peak) in _spans.items()}
+        counters = dict(_counters)
+        if reset:
+            _spans.clear()
+            _counters.clear()
+    return {"spans": spans, "counters": counters}
+
+
+class TurnExporter:
+    """
+    Appends one JSON line per turn (spans + counters since the previous turn) to path.
+    Creating one enables collection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.turn = 0
+        self._file = open(path, "a", buffering=1)
+        snapshot(reset=True)
+        enable()
+
+    def end_turn(self, **extra) -> dict:
+        """Writes this turn's metrics (plus any extra fields) and starts the next turn."""
+        self.turn += 1
+        record = {"turn": self.turn, "time": time.time(), **extra, **snapshot(reset=True)}
+        self._file.write(json.dumps(record) + "\n")
+        return record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -1,121 +1,260 @@
 import cv2
+import hashlib
+import json
+import logging
 import numpy as np
 import os
-from PIL import Image, ImageChops
+
+import metrics
+from frame_cache import as_frame
+from window_capture import read_image
 
 OBJECTS_FOLDER = "Objects"
+INDEX_FILE = "index.json"
+ATLAS_FILE = os.path.join(OBJECTS_FOLDER, "atlas.npz")
+MIN_OBJECT_SIZE = 3
+
+log = logging.getLogger(__name__)
 
-def canny_mask(image: np.ndarray) -> np.ndarray:
+def canny_mask(image) -> np.ndarray:
     """
     Basic Canny edge detection.
     Converts BGR -> Grayscale, then Canny(30,200).
-    Outputs a binary mask.
+    Outputs a binary mask (Canny edges are already 0/255).
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    edges = cv2.Canny(gray, 30, 200)
-    mask = (edges > 0).astype(np.uint8) * 255
-    return mask
+    return as_frame(image).canny(30, 200)
 
-def adaptive_threshold_mask(image: np.ndarray) -> np.ndarray:
+def adaptive_threshold_mask(image) -> np.ndarray:
     """
     Adaptive threshold -> shapes in binary_inv.
     Minimal morphological open to reduce noise.
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    th = cv2.adaptiveThreshold(
-        gray, 255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV,
-        blockSize=11,
-        C=2
-    )
-    # Minimal morphological cleanup
-    kernel = np.ones((3,3), np.uint8)
-    opened = cv2.morphologyEx(th, cv2.MORPH_OPEN, kernel, iterations=1)
-    return opened
+    return as_frame(image).morphology("adaptive", cv2.MORPH_OPEN, ksize=3, iterations=1, block_size=11, c=2)
 
 def combine_masks(mask1: np.ndarray, mask2: np.ndarray) -> np.ndarray:
     """ OR the two masks -> final_mask. """
     return cv2.bitwise_or(mask1, mask2)
 
-def is_duplicate(new_image: Image.Image, existing_images: list[Image.Image]) -> bool:
+def fill_holes(mask: np.ndarray) -> np.ndarray:
+    """Fills background enclosed by the mask, so nested shapes merge into their outer object."""
+    outside = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    cv2.floodFill(outside, None, (0, 0), 255, flags=4)
+    return mask | ~outside[1:-1, 1:-1]
+
+@metrics.timed("detection.objects")
+def find_objects(image, min_size: int = MIN_OBJECT_SIZE):
+    """
+    Single connected-components pass over the combined mask.
+    Returns (crops, boxes): crops are zero-copy views of the image, boxes an (N, 4) array of x,y,w,h.
+    Objects are the outer shapes (same boxes as external contours); tiny ones are dropped in one vectorized filter.
+    """
+    frame = as_frame(image)
+    final_mask = fill_holes(combine_masks(canny_mask(frame), adaptive_threshold_mask(frame)))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(final_mask, connectivity=8)
+    boxes = stats[1:, :4]
+    boxes = boxes[(boxes[:, 2] >= min_size) & (boxes[:, 3] >= min_size)]
+    crops = [frame.image[y:y+h, x:x+w] for x, y, w, h in boxes]
+    metrics.count("objects.found", len(crops))
+    return crops, boxes
+
+def pack_atlas(crops):
     """
-    True if 'new_image' is a pixel-for-pixel match
-    of an existing image in memory.
+    Shelf-packs crops (tallest first) into one image.
+    Returns (atlas, slots) with slots[i] = x,y,w,h of crops[i] inside the atlas.
     """
-    for existing_img in existing_images:
-        try:
-            diff = ImageChops.difference(existing_img, new_image)
-            if not diff.getbbox():
-                return True
-        except:
-            pass
-    return False
-
-def detect_objects(image_path: str):
+    slots = np.zeros((len(crops), 4), dtype=np.int32)
+    if not crops:
+        return np.zeros((0, 0, 3), dtype=np.uint8), slots
+    sizes = np.array([c.shape[1::-1] for c in crops])
+    width = max(int(sizes[:, 0].max()), int(np.sqrt((sizes[:, 0] * sizes[:, 1]).sum())))
+    x = y = shelf = 0
+    for i in np.argsort(-sizes[:, 1], kind="stable"):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        slots[i] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    atlas = np.zeros((y + shelf, width) + crops[0].shape[2:], dtype=crops[0].dtype)
+    for crop, (x, y, w, h) in zip(crops, slots):
+        atlas[y:y+h, x:x+w] = crop
+    return atlas, slots
+
+def load_atlas(path: str = ATLAS_FILE):
+    """Returns (crops, boxes, keys) stored in an atlas file; crops are views of the atlas image."""
+    if not os.path.exists(path):
+        return [], np.zeros((0, 4), dtype=np.int32), []
+    with np.load(path) as data:
+        atlas, slots, boxes, keys = data["atlas"], data["slots"], data["boxes"], list(data["keys"])
+    crops = [atlas[y:y+h, x:x+w] for x, y, w, h in slots]
+    return crops, boxes, keys
+
+def save_atlas(crops, boxes, path: str = ATLAS_FILE, near_duplicates: bool = False, max_distance: int = 4):
     """
-    1) Read BGR image
-    2) Make canny_mask + adaptive_threshold_mask
-    3) OR them -> final_mask
-    4) Contours -> bounding boxes
-    5) Skip duplicates -> store unique
+    Adds the crops not yet in the atlas at path and rewrites it as one .npz
+    (packed image + slots + source boxes + exact keys): a single file write per run.
+    Returns the indices of the crops that were added.
+    """
+    stored, stored_boxes, keys = load_atlas(path)
+    known = set(keys)
+    phashes = np.array([perceptual_hash(c) for c in stored], dtype=np.uint64)
+    added = []
+    for i, crop in enumerate(crops):
+        key = exact_key(crop)
+        if key in known:
+            continue
+        if near_duplicates:
+            phash = perceptual_hash(crop)
+            if len(phashes) and hamming_distances(phashes, phash).min() <= max_distance:
+                continue
+            phashes = np.append(phashes, np.uint64(phash))
+        known.add(key)
+        keys.append(key)
+        added.append(i)
+
+    if added:
+        atlas, slots = pack_atlas(stored + [crops[i] for i in added])
+        boxes = np.concatenate([stored_boxes, np.asarray(boxes, dtype=np.int32)[added].reshape(-1, 4)])
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        np.savez(path, atlas=atlas, slots=slots, boxes=boxes, keys=np.array(keys))
+    return added
+
+def exact_key(crop: np.ndarray) -> str:
+    """Size plus a hash of the raw pixels: equal keys mean a pixel-for-pixel match."""
+    h, w = crop.shape[:2]
+    digest = hashlib.blake2b(np.ascontiguousarray(crop).data, digest_size=12).hexdigest()
+    return f"{w}x{h}:{digest}"
+
+def perceptual_hash(crop: np.ndarray) -> int:
+    """64-bit difference hash (dHash): survives small shifts in colour and scale."""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+def hamming_distances(hashes: np.ndarray, target: int) -> np.ndarray:
+    """Bit differences between every 64-bit hash in hashes and target."""
+    xor = (hashes ^ np.uint64(target)).view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(xor, axis=1).sum(axis=1)
+
+class ObjectIndex:
+    """
+    Persistent hash index of the objects stored in OBJECTS_FOLDER.
+    Exact duplicates are a dict lookup; near duplicates are a Hamming-distance scan over dHashes.
+    """
+
+    def __init__(self, folder: str = OBJECTS_FOLDER):
+        self.folder = folder
+        self.path = os.path.join(folder, INDEX_FILE)
+        self.objects = {}   # file name -> {"exact": key, "phash": int}
+        self.by_exact = {}  # exact key -> file name
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.objects = json.load(f)["objects"]
+        else:
+            self._rebuild()
+        self.by_exact = {entry["exact"]: name for name, entry in self.objects.items()}
+        self.names = list(self.objects)
+        self.phashes = np.array([e["phash"] for e in self.objects.values()], dtype=np.uint64)
+
+    def _rebuild(self):
+        """One-time scan of the folder for stores created before the index existed."""
+        for fname in sorted(os.listdir(self.folder)):
+            if not fname.endswith(".png"):
+                continue
+            crop = cv2.imread(os.path.join(self.folder, fname))
+            if crop is not None:
+                self.objects[fname] = {"exact": exact_key(crop), "phash": perceptual_hash(crop)}
+        self.save()
+        log.info("🗂️ Indexed %d stored objects in %s", len(self.objects), self.path)
+
+    def save(self):
+        """Writes the index next to the stored objects."""
+        with open(self.path, "w") as f:
+            json.dump({"version": 1, "objects": self.objects}, f)
+
+    def find(self, crop: np.ndarray, near_duplicates: bool = False, max_distance: int = 4):
+        """Name of a stored object matching crop, or None."""
+        name = self.by_exact.get(exact_key(crop))
+        if name is not None or not near_duplicates or len(self.phashes) == 0:
+            return name
+        distances = hamming_distances(self.phashes, perceptual_hash(crop))
+        best = int(np.argmin(distances))
+        if distances[best] <= max_distance:
+            return self.names[best]
+        return None
+
+    def next_name(self) -> str:
+        """First unused object_N.png name, so new objects never overwrite stored ones."""
+        n = len(self.objects) + 1
+        while f"object_{n}.png" in self.objects or os.path.exists(os.path.join(self.folder, f"object_{n}.png")):
+            n += 1
+        return f"object_{n}.png"
+
+    def add(self, name: str, crop: np.ndarray):
+        """Registers a newly saved object (call save() to persist)."""
+        entry = {"exact": exact_key(crop), "phash": perceptual_hash(crop)}
+        self.objects[name] = entry
+        self.by_exact[entry["exact"]] = name
+        self.names.append(name)
+        self.phashes = np.append(self.phashes, np.uint64(entry["phash"]))
+
+def detect_objects(image_path, near_duplicates: bool = False, max_distance: int = 4, output: str = "png",
+                   atlas_path: str = ATLAS_FILE, folder: str = OBJECTS_FOLDER):
+    """
+    1) Read BGR image (file path or numpy frame region)
+    2) Make canny_mask + adaptive_threshold_mask, OR them -> final_mask
+    3) One connected-components pass -> bounding boxes (see find_objects)
+    4) Skip duplicates (hash index; optionally dHash within max_distance bits) -> store unique
+       output="png": one file per object in folder (original format)
+       output="atlas": all new objects packed into atlas_path in one write
+       output=None: nothing is written (use find_objects for the crops themselves)
     Return { 'object_#.png': (x,y,w,h) }
     """
-    image = cv2.imread(image_path)
-    if image is None:
-        print(f"❌ Could not read image: {image_path}")
+    source = read_image(image_path)
+    if source is None:
+        log.error("❌ Could not read image: %s", image_path)
         return {}, image_path
 
-    # 1) Build the two masks
-    mask_canny = canny_mask(image)
-    mask_adapt = adaptive_threshold_mask(image)
+    crops, boxes = find_objects(source)
+    log.info("🔍 Found %d objects in final mask.", len(boxes))
 
-    # 2) Combine
-    final_mask = combine_masks(mask_canny, mask_adapt)
+    if output is None:
+        return {f"object_{i}": tuple(int(v) for v in box) for i, box in enumerate(boxes, start=1)}, image_path
 
-    # 3) Contours
-    contours, _ = cv2.findContours(final_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    print(f"🔍 Found {len(contours)} contours in final mask.")
+    if output == "atlas":
+        added = save_atlas(crops, boxes, atlas_path, near_duplicates, max_distance)
+        log.info("✅ Packed %d new objects into %s.", len(added), atlas_path)
+        return {f"object_{i + 1}": tuple(int(v) for v in boxes[i]) for i in added}, image_path
 
     # Ensure the folder
-    if not os.path.exists(OBJECTS_FOLDER):
-        os.makedirs(OBJECTS_FOLDER)
-
-    # Load existing images to skip duplicates
-    from PIL import Image
-    existing_images = []
-    for fname in os.listdir(OBJECTS_FOLDER):
-        fpath = os.path.join(OBJECTS_FOLDER, fname)
-        try:
-            existing_images.append(Image.open(fpath).convert("RGB"))
-        except:
-            pass
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    # Hash index of stored objects replaces reloading every PNG
+    index = ObjectIndex(folder)
 
     object_positions = {}
     unique_count = 0
 
-    # 4) Loop bounding boxes -> skip duplicates -> save
-    for idx, contour in enumerate(contours, start=1):
-        x, y, w, h = cv2.boundingRect(contour)
-        # Filter out too-tiny objects
-        if w < 3 or h < 3:
-            continue
-
-        cropped = image[y:y+h, x:x+w]
-        pil_obj = Image.fromarray(cv2.cvtColor(cropped, cv2.COLOR_BGR2RGB))
-
-        if is_duplicate(pil_obj, existing_images):
-            print(f"⚠️ Skipped duplicate object at ({x},{y})")
+    # Loop bounding boxes -> skip duplicates -> save
+    for cropped, (x, y, w, h) in zip(crops, boxes):
+        if index.find(cropped, near_duplicates, max_distance) is not None:
+            log.debug("⚠️ Skipped duplicate object at (%d,%d)", x, y)
             continue
 
-        obj_name = f"object_{unique_count + 1}.png"
-        obj_path = os.path.join(OBJECTS_FOLDER, obj_name)
+        obj_name = index.next_name()
+        obj_path = os.path.join(folder, obj_name)
         cv2.imwrite(obj_path, cropped)
-        existing_images.append(pil_obj)
+        index.add(obj_name, cropped)
 
-        object_positions[obj_name] = (x, y, w, h)
+        object_positions[obj_name] = (int(x), int(y), int(w), int(h))
         unique_count += 1
-        print(f"📸 Saved unique object {unique_count}: {obj_path}")
+        log.debug("📸 Saved unique object %d: %s", unique_count, obj_path)
 
-    print(f"✅ Detected {unique_count} objects (simple approach).")
+    if unique_count:
+        index.save()
+    log.info("✅ Detected %d objects (simple approach).", unique_count)
     return object_positions, image_path
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+
+# Content-addressed cache for OCR results.
+#
+# Keys are a hash of the exact pixels handed to Tesseract plus the OCR config
+# and the backend that reads them (tesserocr and pytesseract disagree on
+# details), so a scoreboard or clue list that has not changed is never read
+# twice. Callers get their own copy of a result, so editing one cannot leak
+# into later hits.
+# Tier 1 is a bounded in-memory LRU; tier 2 is an optional sqlite file that
+# survives restarts (set OCR_CACHE_PATH or call enable_disk()).
+# Misses are single-flight: when several threads (e.g. sessions showing the
+# same screen) ask for the same key at once, one calls Tesseract and the rest
+# wait for its result.
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def image_key(kind: str, image: np.ndarray, config: str, backend: str = "") -> str:
+    """Fast hash of a preprocessed image, its shape and the OCR call (and backend) it is for."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{backend}|{kind}|{config}|{image.shape}|{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+def _copy(value):
+    """Fresh copy of an OCR result (a string, or a dict of word-box lists)."""
+    if isinstance(value, dict):
+        return {name: list(column) if isinstance(column, list) else column for name, column in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+class OCRCache:
+    """Two-tier (memory LRU + optional sqlite) OCR result cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, disk_path: str = None):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> [Event, result] of a computation under way
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.miss_seconds = 0.0
+        if disk_path:
+            self.enable_disk(disk_path)
+
+    def enable_disk(self, path: str):
+        """Turns on the persistent tier backed by a sqlite file at path."""
+        with self._lock:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(self, kind: str, image: np.ndarray, config: str, compute, backend: str = ""):
+        """
+        Returns (a copy of) the cached result for (kind, image, config, backend),
+        calling compute(image, config) on a miss.
+        """
+        key = image_key(kind, image, config, backend)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                metrics.count("ocr.cache_hits")
+                return _copy(self._memory[key])
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM ocr WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    metrics.count("ocr.cache_hits")
+                    return _copy(value)
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = [threading.Event(), None]
+
+        if not owner:
+            pending[0].wait()
+            if pending[1] is not None:
+                with self._lock:
+                    self.coalesced += 1
+                metrics.count("ocr.cache_coalesced")
+                return _copy(pending[1])
+            # The first caller failed; try on our own
+            return self.get_or_compute(kind, image, config, compute, backend)
+
+        try:
+            metrics.count("ocr.engine_calls")
+            start = time.perf_counter()
+            value = compute(image, config)
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.misses += 1
+                self.miss_seconds += elapsed
+                self._remember(key, value)
+                if self._db is not None:
+                    self._db.execute("INSERT OR REPLACE INTO ocr VALUES (?, ?)", (key, json.dumps(value)))
+                    self._db.commit()
+            pending[1] = value
+            return _copy(value)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending[0].set()
+
+    def clear(self):
+        """Drops the in-memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and an estimate of OCR time saved by hits."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.coalesced
+            lookups = hits + self.misses
+            average_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "ocr_seconds": self.miss_seconds,
+                "saved_seconds": hits * average_miss,
+            }
+
+
+cache = OCRCache(disk_path=os.environ.get("OCR_CACHE_PATH"))
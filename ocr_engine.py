@@ -0,0 +1,134 @@
+import os
+import re
+import shutil
+import threading
+
+import cv2
+import numpy as np
+import pytesseract
+
+import metrics
+from ocr_cache import cache
+
+# One place that talks to Tesseract.
+#
+# With tesserocr installed, every thread keeps one warm in-process engine per
+# config and images are handed over as raw numpy buffers (no process spawn,
+# no temp files). Without it, calls fall back to pytesseract.
+# Results are cached by image content + config (see ocr_cache).
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Part of every cache key: the two backends do not return identical results
+BACKEND = "pytesseract" if tesserocr is None else "tesserocr"
+
+# If Tesseract is not in PATH, set it manually (or export TESSERACT_CMD):
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "/opt/homebrew/bin/tesseract")
+if os.path.exists(TESSERACT_CMD) or not shutil.which("tesseract"):
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+DIGITS = "0123456789"
+
+_local = threading.local()
+
+
+def _parse_config(config: str):
+    """Splits a pytesseract-style config ("--oem 3 --psm 6 digits") into (psm, oem, variables)."""
+    psm = re.search(r"--psm\s+(\d+)", config)
+    oem = re.search(r"--oem\s+(\d+)", config)
+    variables = dict(re.findall(r"-c\s+(\w+)=(\S+)", config))
+    if re.search(r"(^|\s)digits(\s|$)", config):
+        variables["tessedit_char_whitelist"] = DIGITS
+    return (int(psm.group(1)) if psm else 3), (int(oem.group(1)) if oem else 3), variables
+
+
+def _engine(config: str):
+    """This thread's warm tesserocr engine for config, created on first use."""
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    api = engines.get(config)
+    if api is None:
+        psm, oem, variables = _parse_config(config)
+        api = tesserocr.PyTessBaseAPI(psm=psm, oem=oem)
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        engines[config] = api
+    return api
+
+
+def _set_image(api, image: np.ndarray):
+    """Hands a grayscale or BGR numpy image to the engine without encoding it."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB if image.shape[2] == 3 else cv2.COLOR_BGRA2RGB)
+    image = np.ascontiguousarray(image)
+    height, width = image.shape[:2]
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+
+def _image_to_string(image: np.ndarray, config: str) -> str:
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, config=config)
+    api = _engine(config)
+    _set_image(api, image)
+    return api.GetUTF8Text()
+
+
+def _image_to_data(image: np.ndarray, config: str) -> dict:
+    if tesserocr is None:
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+    api = _engine(config)
+    _set_image(api, image)
+    api.Recognize()
+
+    data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+    level = tesserocr.RIL.WORD
+    iterator = api.GetIterator()
+    if iterator is None:
+        return data
+    for word in tesserocr.iterate_level(iterator, level):
+        box = word.BoundingBox(level)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        data["text"].append(word.GetUTF8Text(level) or "")
+        data["conf"].append(word.Confidence(level))
+        data["left"].append(x1)
+        data["top"].append(y1)
+        data["width"].append(x2 - x1)
+        data["height"].append(y2 - y1)
+    return data
+
+
+def image_to_string(image: np.ndarray, config: str = "") -> str:
+    """OCR text of a numpy image (grayscale or BGR)."""
+    metrics.count("ocr.calls")
+    with metrics.span("ocr"):
+        return cache.get_or_compute("string", image, config, _image_to_string, BACKEND)
+
+
+def image_to_data(image: np.ndarray, config: str = "") -> dict:
+    """
+    Word boxes of a numpy image in pytesseract's Output.DICT layout
+    (text, conf, left, top, width, height lists).
+    """
+    metrics.count("ocr.calls")
+    with metrics.span("ocr"):
+        return cache.get_or_compute("data", image, config, _image_to_data, BACKEND)
+
+
+def warm_up(configs=("",)):
+    """Starts the calling thread's engines for configs (bypassing the cache); raises if OCR is unavailable."""
+    blank = np.full((32, 32), 255, np.uint8)
+    for config in configs:
+        _image_to_string(blank, config)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the OCR result cache."""
+    return cache.stats()
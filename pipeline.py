@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+# Dependency-driven stage runner.
+#
+# Stages declare what they need ("search depends on clues and grid"); every
+# stage starts on the thread pool as soon as its inputs are ready, so
+# independent OCR stages overlap and wall-clock time approaches the longest
+# chain. tesserocr releases the GIL while recognizing, so OCR threads really
+# run side by side. The default pool lives for the whole process: OCR engines
+# are kept per thread, so fresh threads would pay engine start-up every run.
+
+DEFAULT_WORKERS = 4
+
+_executor = None
+_executor_workers = DEFAULT_WORKERS
+_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Process-wide stage pool (created on first use) whose threads keep their warm OCR engines."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix="stage")
+        return _executor
+
+
+def set_shared_workers(workers: int):
+    """
+    Sizes the shared stage pool; only before its first use. Batch worker processes use 1:
+    the processes already fill the cores, extra OCR threads would only compete with them.
+    """
+    global _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            raise RuntimeError("The shared stage pool is already running")
+        _executor_workers = workers
+
+
+class Pipeline:
+    """
+    stage(name, fn, depends) registers fn(**results of depends); run() executes
+    the graph and returns {stage name: result}.
+    """
+
+    def __init__(self):
+        self.stages = {}  # name -> (fn, depends)
+
+    def stage(self, name: str, fn, depends=()):
+        """Adds a stage; dependencies must already be declared (which also rules out cycles)."""
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} declared twice")
+        missing = [d for d in depends if d not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on undeclared stage(s) {missing}")
+        self.stages[name] = (fn, tuple(depends))
+        return self
+
+    @staticmethod
+    def _call(name, fn, inputs):
+        with metrics.span(f"stage.{name}"):
+            return fn(**inputs)
+
+    def run(self, executor=None) -> dict:
+        """
+        Runs every stage once its dependencies finished. The first stage error is
+        re-raised after the stages already running have finished; nothing new is started.
+        Uses executor if given, otherwise shared_executor().
+        """
+        executor = executor or shared_executor()
+
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        try:
+            while pending or running:
+                for name, (fn, depends) in list(pending.items()):
+                    if all(d in results for d in depends):
+                        del pending[name]
+                        inputs = {d: results[d] for d in depends}
+                        running[executor.submit(self._call, name, fn, inputs)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        finally:
+            if running:
+                wait(running)
+        return results
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+import metrics
+
+# Screen regions stored relative to the game window instead of as absolute
+# screen rectangles.
+#
+# A profile names its regions (what the bot reads: clue list, grid, dice, ...)
+# and its anchors (static UI such as buttons), each as (x, y, w, h) fractions
+# of the window, so it survives moving the window. Anchors have a reference crop
+# in ANCHORS_FOLDER. locate_regions() finds the anchors in a frame with
+# multi-scale template matching on a downscaled pyramid level (refined at full
+# resolution), fits the scale and offset that carries the profile's anchors
+# onto them, and moves the regions by it; that absorbs resized windows and
+# shifted layouts. Results are cached per window size in CACHE_PATH, so
+# localization runs once per size, not once per frame. A profile without
+# anchors (or whose anchors are not on screen) is cached per window size in
+# memory only, so the next run tries again.
+
+# Next to this module, so the bot finds its profiles whatever directory it is started from
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILES_PATH = os.path.join(BASE_DIR, "region_profiles.json")
+CACHE_PATH = os.path.join(BASE_DIR, "region_cache.json")
+ANCHORS_FOLDER = os.path.join(BASE_DIR, "RegionAnchors")
+
+PYRAMID_LEVELS = 2                      # coarse search at 1/4 resolution
+SCALES = (0.8, 0.9, 1.0, 1.1, 1.25)     # anchor sizes tried, relative to the profile's size
+MIN_SCORE = 0.6                         # weaker matches are ignored
+REFINE_MARGIN = 8                       # full-resolution search margin around the coarse hit (px)
+
+log = logging.getLogger(__name__)
+
+# (cache path, profile@WxH) -> {region: fractions}; mirrors the cache file
+_located = {}
+_cache_lock = threading.Lock()
+
+
+def _load_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_json(path: str, data: dict):
+    # Write-then-rename, so concurrent readers (batch workers) never see a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+def load_profile(name: str, path: str = PROFILES_PATH) -> dict:
+    """{"regions": {name: fractions}, "anchors": {name: fractions}} of a saved profile."""
+    profile = _load_json(path).get("profiles", {}).get(name, {})
+    return {kind: {key: tuple(rect) for key, rect in profile.get(kind, {}).items()}
+            for kind in ("regions", "anchors")}
+
+def forget_located(profile: str, cache_path: str = CACHE_PATH):
+    """Drops the cached localizations of a profile (after it was edited)."""
+    prefix = f"{profile}@"
+    with _cache_lock:
+        cache = {k: v for k, v in _load_json(cache_path).items() if not k.startswith(prefix)}
+        _save_json(cache_path, cache)
+        for key in [key for key in _located if key[0] == cache_path and key[1].startswith(prefix)]:
+            del _located[key]
+
+def save_rect(profile: str, name: str, rect, window_size, kind: str = "regions",
+              path: str = PROFILES_PATH, cache_path: str = CACHE_PATH):
+    """
+    Stores rect = (x, y, w, h), relative to a window of window_size = (w, h), as fractions
+    under the profile's "regions" or "anchors".
+    """
+    win_w, win_h = window_size
+    x, y, w, h = rect
+    data = _load_json(path)
+    data.setdefault("version", 1)
+    entry = data.setdefault("profiles", {}).setdefault(profile, {})
+    entry.setdefault(kind, {})[name] = [round(x / win_w, 5), round(y / win_h, 5),
+                                        round(w / win_w, 5), round(h / win_h, 5)]
+    _save_json(path, data)
+    forget_located(profile, cache_path)
+    log.info("💾 Saved %s %s/%s to %s", kind[:-1], profile, name, path)
+
+def to_pixels(fractions, frame_shape):
+    """Pixel rectangle (x, y, w, h) of a window-fraction rect in a whole-window frame."""
+    height, width = frame_shape[:2]
+    fx, fy, fw, fh = fractions
+    return int(round(fx * width)), int(round(fy * height)), int(round(fw * width)), int(round(fh * height))
+
+def to_screen(fractions, bounds):
+    """Absolute screen rectangle in points of a window-fraction rect, for bounds = window (x, y, w, h)."""
+    win_x, win_y, win_w, win_h = bounds
+    fx, fy, fw, fh = fractions
+    return (int(round(win_x + fx * win_w)), int(round(win_y + fy * win_h)),
+            int(round(fw * win_w)), int(round(fh * win_h)))
+
+def union(rects):
+    """Smallest rectangle covering every (x, y, w, h) in rects."""
+    rects = list(rects)
+    left = min(x for x, _, _, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    right = max(x + w for x, _, w, _ in rects)
+    bottom = max(y + h for _, y, _, h in rects)
+    return left, top, right - left, bottom - top
+
+# -------------------------------------------------------
+# Anchors and localization
+
+def anchor_path(profile: str, anchor: str, folder: str = ANCHORS_FOLDER) -> str:
+    return os.path.join(folder, f"{profile}_{anchor}.png")
+
+def save_anchor(profile: str, anchor: str, frame: np.ndarray, path: str = PROFILES_PATH,
+                folder: str = ANCHORS_FOLDER, cache_path: str = CACHE_PATH):
+    """Crops the profile's anchor rect out of a whole-window frame as the anchor's reference image."""
+    x, y, w, h = to_pixels(load_profile(profile, path)["anchors"][anchor], frame.shape)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    cv2.imwrite(anchor_path(profile, anchor, folder), np.asarray(frame)[y:y + h, x:x + w])
+    forget_located(profile, cache_path)
+
+def _match(image: np.ndarray, template: np.ndarray):
+    """(score, (x, y)) of the best normalized-correlation match, or (-1, None) if it does not fit."""
+    if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1] or min(template.shape[:2]) < 4:
+        return -1.0, None
+    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, location = cv2.minMaxLoc(result)
+    return score, location
+
+def locate_anchor(gray: np.ndarray, coarse: np.ndarray, anchor: np.ndarray, expected_size):
+    """
+    Finds an anchor image in a grayscale window frame: every scale is tried on the coarse
+    pyramid level, the winner is refined at full resolution.
+    Returns (score, (x, y, w, h) pixels or None).
+    """
+    factor = 2 ** PYRAMID_LEVELS
+    exp_w, exp_h = expected_size
+    best = (-1.0, None, None)
+    for scale in SCALES:
+        template = cv2.resize(anchor, (int(round(exp_w * scale / factor)), int(round(exp_h * scale / factor))),
+                              interpolation=cv2.INTER_AREA)
+        score, location = _match(coarse, template)
+        if score > best[0]:
+            best = (score, location, scale)
+    score, location, scale = best
+    if location is None:
+        return score, None
+
+    # Refine around the coarse hit at full resolution
+    w, h = int(round(exp_w * scale)), int(round(exp_h * scale))
+    x0 = max(location[0] * factor - REFINE_MARGIN, 0)
+    y0 = max(location[1] * factor - REFINE_MARGIN, 0)
+    window = gray[y0:y0 + h + 2 * REFINE_MARGIN, x0:x0 + w + 2 * REFINE_MARGIN]
+    template = cv2.resize(anchor, (w, h), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    fine_score, fine = _match(window, template)
+    if fine is None:
+        return score, (location[0] * factor, location[1] * factor, w, h)
+    return fine_score, (x0 + fine[0], y0 + fine[1], w, h)
+
+def fit_transform(expected, found):
+    """
+    Per-axis scale and offset (sx, sy, dx, dy) with found ≈ s * expected + d, from pairs of
+    pixel rects: least squares on their centres, or the rect size ratio for a single pair.
+    """
+    e = np.array([(x + w / 2, y + h / 2) for x, y, w, h in expected], np.float64)
+    f = np.array([(x + w / 2, y + h / 2) for x, y, w, h in found], np.float64)
+    sizes = np.array([(fw / ew, fh / eh) for (_, _, ew, eh), (_, _, fw, fh) in zip(expected, found)])
+    e_dev, f_dev = e - e.mean(axis=0), f - f.mean(axis=0)
+    spread = (e_dev ** 2).sum(axis=0)
+    # An axis the anchors do not spread along falls back to the matched size ratio
+    scale = np.where(spread > 1, (e_dev * f_dev).sum(axis=0) / np.maximum(spread, 1), sizes.mean(axis=0))
+    dx, dy = f.mean(axis=0) - scale * e.mean(axis=0)
+    return scale[0], scale[1], dx, dy
+
+def cached_regions(bounds, profile: str, cache_path: str = CACHE_PATH):
+    """{region: window fractions} already located for this window size, or None."""
+    key = f"{profile}@{bounds[2]}x{bounds[3]}"
+    regions = _located.get((cache_path, key))
+    if regions is None:
+        cached = _load_json(cache_path).get(key)
+        if cached is None:
+            return None
+        regions = _located[(cache_path, key)] = {name: tuple(rect) for name, rect in cached.items()}
+    metrics.count("localize.cache_hits")
+    return regions
+
+def _remember_fallback(cache_path: str, key: str, regions: dict) -> dict:
+    """
+    Caches unlocated regions for this window size in memory only: later frames skip the
+    search, a restart (or forget_located) retries it.
+    """
+    with _cache_lock:
+        _located[(cache_path, key)] = regions
+    return regions
+
+@metrics.timed("localize")
+def locate_regions(frame: np.ndarray, bounds, profile: str, path: str = PROFILES_PATH,
+                   cache_path: str = CACHE_PATH, folder: str = ANCHORS_FOLDER) -> dict:
+    """
+    {region: window fractions} in a whole-window frame grabbed at bounds: the profile's
+    regions moved by the transform fitted to its located anchors, or unchanged if no
+    anchor is found. Cached per window size.
+    """
+    cached = cached_regions(bounds, profile, cache_path)
+    if cached is not None:
+        return cached
+
+    key = f"{profile}@{bounds[2]}x{bounds[3]}"
+    saved = load_profile(profile, path)
+    regions = saved["regions"]
+    if not saved["anchors"]:
+        if not regions:
+            log.warning("⚠️ Profile %s has no regions in %s; record them with region_selector.py", profile, path)
+        return _remember_fallback(cache_path, key, regions)
+    frame = np.asarray(frame)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    coarse = gray
+    for _ in range(PYRAMID_LEVELS):
+        coarse = cv2.pyrDown(coarse)
+
+    expected, found = [], []
+    for name, fractions in saved["anchors"].items():
+        anchor = cv2.imread(anchor_path(profile, name, folder), cv2.IMREAD_GRAYSCALE)
+        if anchor is None:
+            continue
+        rect = to_pixels(fractions, frame.shape)
+        score, match = locate_anchor(gray, coarse, anchor, rect[2:])
+        if match is None or score < MIN_SCORE:
+            log.warning("⚠️ Anchor %s/%s not found (score %.2f)", profile, name, score)
+            continue
+        log.debug("🎯 Anchor %s/%s at %s (score %.2f)", profile, name, match, score)
+        expected.append(rect)
+        found.append(match)
+
+    if found:
+        sx, sy, dx, dy = fit_transform(expected, found)
+        height, width = frame.shape[:2]
+        for name, fractions in regions.items():
+            x, y, w, h = to_pixels(fractions, frame.shape)
+            regions[name] = (round((sx * x + dx) / width, 5), round((sy * y + dy) / height, 5),
+                             round(sx * w / width, 5), round(sy * h / height, 5))
+        log.info("🎯 Located %s regions from %d anchors (scale %.3f x %.3f, offset %+.0f,%+.0f px)",
+                 profile, len(found), sx, sy, dx, dy)
+    else:
+        log.warning("⚠️ No %s anchors found; using the profile's regions", profile)
+        return _remember_fallback(cache_path, key, regions)
+
+    with _cache_lock:
+        cache = _load_json(cache_path)
+        cache[key] = {name: list(rect) for name, rect in regions.items()}
+        _save_json(cache_path, cache)
+        _located[(cache_path, key)] = regions
+    return regions
+
+def window_regions(bounds, profile: str, grab_window=None, path: str = PROFILES_PATH,
+                   cache_path: str = CACHE_PATH, required=()) -> dict:
+    """
+    {region: absolute screen rectangle in points} for the window at bounds.
+    grab_window() returns a whole-window frame; it is only called when this window
+    size has not been localized yet. Without it, the profile's regions are used as saved.
+    Raises ValueError if a region named in required is not in the profile.
+    """
+    regions = cached_regions(bounds, profile, cache_path)
+    if regions is None and grab_window is not None:
+        frame = grab_window()
+        if frame is not None:
+            regions = locate_regions(frame, bounds, profile, path, cache_path)
+    if regions is None:
+        regions = load_profile(profile, path)["regions"]
+    missing = [name for name in required if name not in regions]
+    if missing:
+        if not regions:
+            raise ValueError(f"No regions for profile {profile!r} in {path}; record them with region_selector.py")
+        raise ValueError(f"Profile {profile!r} in {path} has no {', '.join(missing)} region; "
+                         f"record it with region_selector.py")
+    return {name: to_screen(fractions, bounds) for name, fractions in regions.items()}
@@ -1,10 +1,21 @@
+import argparse
 import tkinter as tk
 
+from region_profiles import PROFILES_PATH, save_anchor, save_rect
+from window_capture import ScreenCapture, get_window_bounds
+
 class RegionSelectorUI:
-    def __init__(self, window_x, window_y):
-        """Initializes the region selector relative to the iPhone Mirroring window."""
-        self.window_x = window_x  # ✅ Store iPhone Mirroring window X
-        self.window_y = window_y  # ✅ Store iPhone Mirroring window Y
+    def __init__(self, window_bounds, profile, name, kind="regions", path=PROFILES_PATH):
+        """
+        Initializes the region selector relative to the iPhone Mirroring window.
+        On ENTER the selection is saved to the region profile as window fractions.
+        """
+        self.window_x, self.window_y, self.window_w, self.window_h = window_bounds  # ✅ iPhone Mirroring window
+        self.profile = profile
+        self.name = name
+        self.kind = kind  # ✅ "regions" (read by the bot) or "anchors" (static UI used to locate them)
+        self.path = path
+        self.confirmed = False
 
         self.root = tk.Tk()
         self.root.title("Region Selector")
@@ -12,7 +23,7 @@ class RegionSelectorUI:
         self.root.geometry("300x200+100+100")  # ✅ Default size and position
         self.root.configure(bg="gray")
 
-        self.label = tk.Label(self.root, text="Move & Resize the window.\nPress ENTER to confirm.",
+        self.label = tk.Label(self.root, text=f"Move & Resize over '{name}'.\nPress ENTER to confirm.",
                               bg="gray", fg="white", font=("Arial", 12))
         self.label.pack(expand=True, fill=tk.BOTH)
 
@@ -34,18 +45,41 @@ class RegionSelectorUI:
         self.relative_x = self.absolute_x - self.window_x
         self.relative_y = self.absolute_y - self.window_y
 
-        print(f"🔵 Moving Window: X={self.absolute_x}, Y={self.absolute_y}, Width={self.width}, Height={self.height}")
-        print(f"📏 Relative to iPhone Mirroring: X={self.relative_x}, Y={self.relative_y}, Width={self.width}, Height={self.height}")
-
     def confirm_selection(self, event=None):
-        """Prints the final relative selection and closes the window."""
-        print(f"✅ Final Selection (Relative to iPhone Mirroring): X={self.relative_x}, Y={self.relative_y}, Width={self.width}, Height={self.height}")
+        """Saves the final relative selection to the region profile and closes the window."""
+        rect = (self.relative_x, self.relative_y, self.width, self.height)
+        save_rect(self.profile, self.name, rect, (self.window_w, self.window_h), self.kind, self.path)
+        print(f"✅ Saved {self.profile}/{self.name} (Relative to iPhone Mirroring): "
+              f"X={self.relative_x}, Y={self.relative_y}, Width={self.width}, Height={self.height}")
+        self.confirmed = True
         self.root.destroy()
 
-def select_region(window_x, window_y):
-    """Launches the UI overlay to select a region relative to iPhone Mirroring window."""
-    RegionSelectorUI(window_x, window_y)
+def select_region(profile, name, kind="regions", app_name="iPhone Mirroring", path=PROFILES_PATH):
+    """
+    Launches the UI overlay to select a region relative to the iPhone Mirroring window
+    and saves it to the profile. Anchors also get their reference image captured.
+    """
+    bounds = get_window_bounds(app_name)
+    if bounds is None:
+        print("❌ Could not get iPhone Mirroring window.")
+        return False
+    selector = RegionSelectorUI(bounds, profile, name, kind, path)
+    if selector.confirmed and kind == "anchors":
+        # ✅ Overlay is gone, so the capture shows the anchor itself
+        frame = ScreenCapture(app_name).grab(bounds)
+        if frame is None:
+            print("❌ Could not capture the anchor image.")
+            return False
+        save_anchor(profile, name, frame, path)
+        print(f"⚓ Saved anchor image for {profile}/{name}")
+    return selector.confirmed
 
 if __name__ == "__main__":
-    # Test Run: Replace with actual values from get_window_bounds()
-    select_region(1173, 243)  # Example window position (Replace with real data)
+    parser = argparse.ArgumentParser(description="Select a region of the iPhone Mirroring window and save it to a profile.")
+    parser.add_argument("profile", help="Profile name, e.g. word_search.")
+    parser.add_argument("name", help="Region name, e.g. clue, grid, dice, scoreboard.")
+    parser.add_argument("--anchor", action="store_true",
+                        help="Save as an anchor (static UI used to locate the regions) and capture its image.")
+    parser.add_argument("--app", default="iPhone Mirroring")
+    args = parser.parse_args()
+    select_region(args.profile, args.name, "anchors" if args.anchor else "regions", args.app)
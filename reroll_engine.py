@@ -0,0 +1,58 @@
+import numpy as np
+
+from game_state import ROLL_INDEX
+from yahtzee_solver import TRANSITIONS, HOLDS, category_totals, load_values, state_from_scoreboard
+
+# HOLD_TRANSITIONS[r] is a (32, 252) matrix: row h is the outcome distribution
+# after holding the dice selected by bit mask h of sorted roll r and rerolling the rest.
+HOLD_TRANSITIONS = TRANSITIONS[HOLDS].astype(np.float32)
+
+# MASK_BITS[h, j] is 1 when hold mask h keeps die j.
+MASK_BITS = (np.arange(32)[:, None] >> np.arange(5)) & 1
+
+
+def roll_values(open_mask: int, upper: int, bonus: int, rolls_left: int) -> np.ndarray:
+    """
+    Expected final score of standing on each of the 252 rolls with rolls_left
+    rerolls still available. Returns a (252,) vector.
+    """
+    value = category_totals(open_mask, [upper], [bonus], load_values()).max(axis=2)
+    for _ in range(rolls_left):
+        value = (value @ TRANSITIONS.T)[:, HOLDS].max(axis=2)
+    return value[0]
+
+
+def hold_values(dice_values, rolls_left: int, open_mask: int, upper: int = 0, bonus: int = 0) -> np.ndarray:
+    """
+    Expected final score of each of the 32 hold masks for the current dice.
+    Mask bit i refers to position i of dice_values as given.
+    """
+    order = np.argsort(dice_values, kind="stable")
+    r = ROLL_INDEX[tuple(int(d) for d in np.asarray(dice_values)[order])]
+    after = roll_values(open_mask, upper, bonus, rolls_left - 1)
+    sorted_values = HOLD_TRANSITIONS[r] @ after.astype(np.float32)
+
+    # Re-express sorted-position masks in the caller's dice order.
+    masks = MASK_BITS @ (1 << order)
+    values = np.empty(32, dtype=np.float32)
+    values[masks] = sorted_values
+    return values
+
+
+def best_hold(dice_values, rolls_left: int, open_mask: int, upper: int = 0, bonus: int = 0):
+    """
+    Picks the dice to hold before the next reroll.
+    Returns (hold mask over dice_values positions, expected final score).
+    """
+    if rolls_left <= 0:
+        return 0b11111, None
+    values = hold_values(dice_values, rolls_left, open_mask, upper, bonus)
+    mask = int(np.argmax(values))
+    return mask, float(values[mask])
+
+
+def decide_hold(dice_values, rolls_left: int, scoreboard_data):
+    """Returns a list of 5 booleans (True = hold) for a GameState or an extract_scoreboard dict."""
+    open_mask, upper, bonus = state_from_scoreboard(scoreboard_data)
+    mask, _ = best_hold(dice_values, rolls_left, open_mask, upper, bonus)
+    return [bool(mask >> i & 1) for i in range(5)]
@@ -1,49 +1,243 @@
 import cv2
-import pytesseract
+import json
+import logging
+import os
+import re
+import tempfile
 import numpy as np
 
-def preprocess_image(image):
-    """Enhances the image for OCR by converting to grayscale and thresholding."""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
-    return thresh
+import metrics
+import ocr_engine
+from frame_cache import as_frame, preprocess_image
+from game_state import CATEGORIES, CATEGORY_INDEX, NUM_CATEGORIES, GameState
+from window_capture import read_image
 
-def extract_scoreboard(image_path):
-    """Extracts filled and empty score slots from the scoreboard."""
-    
-    # Load the image
-    image = cv2.imread(image_path)
+log = logging.getLogger(__name__)
+
+# Calibrated score-cell rectangles, keyed by scoreboard image size ("WxH")
+LAYOUT_PATH = "scoreboard_layout.json"
+DIGITS_CONFIG = r'--oem 3 --psm 7 digits'
+
+# Share of dark pixels below which a score cell is considered empty
+EMPTY_INK_RATIO = 0.01
+
+# How each category's row label may be printed in the app (longest first wins)
+CATEGORY_LABELS = {
+    "ones": ["ones", "aces", "1s"],
+    "twos": ["twos", "2s"],
+    "threes": ["threes", "3s"],
+    "fours": ["fours", "4s"],
+    "fives": ["fives", "5s"],
+    "sixes": ["sixes", "6s"],
+    "three_of_a_kind": ["three of a kind", "3 of a kind", "3 kind", "3x"],
+    "four_of_a_kind": ["four of a kind", "4 of a kind", "4 kind", "4x"],
+    "full_house": ["full house"],
+    "small_straight": ["small straight", "sm straight", "sm str"],
+    "large_straight": ["large straight", "lg straight", "lg str"],
+    "yahtzee": ["yahtzee"],
+    "chance": ["chance"],
+}
+
+def _label_category(text: str):
+    """Category whose label appears in one OCR line of text, or None."""
+    text = " " + re.sub(r"[^a-z0-9 ]", " ", text.lower().replace("_", " ")) + " "
+    text = re.sub(r"\s+", " ", text)
+    matches = [
+        (len(label), category)
+        for category, labels in CATEGORY_LABELS.items()
+        for label in labels
+        if f" {label} " in text
+    ]
+    return max(matches)[1] if matches else None
+
+def calibrate_scoreboard(image: np.ndarray):
+    """
+    One-time layout pass: finds the 13 category rows with full-page OCR and
+    returns their score-cell rectangles as {category: (x, y, w, h)}.
+    Rows OCR misses are interpolated from the others in the same section.
+    Returns None if too few rows were found.
+    """
+    data = ocr_engine.image_to_data(image, config="--psm 6")
+
+    # Group words into lines by vertical centre
+    lines = []
+    for text, left, top, width, height in zip(data["text"], data["left"], data["top"], data["width"], data["height"]):
+        if not str(text).strip():
+            continue
+        centre = top + height / 2
+        for line in lines:
+            if abs(line["centre"] - centre) < height / 2:
+                break
+        else:
+            line = {"centre": centre, "words": [], "right": 0, "height": 0}
+            lines.append(line)
+        line["words"].append(str(text))
+        line["height"] = max(line["height"], height)
+        # Only label words set the label's right edge, not a score already written on the row
+        if not str(text).strip().isdigit():
+            line["right"] = max(line["right"], left + width)
+
+    rows = {}
+    for line in lines:
+        category = _label_category(" ".join(line["words"]))
+        if category is not None and category not in rows:
+            rows[category] = line
+
+    # Fill in missing rows per section from a linear fit of row index -> centre
+    centres = {}
+    for section in (range(0, 6), range(6, NUM_CATEGORIES)):
+        found = [(c - section[0], rows[CATEGORIES[c]]["centre"]) for c in section if CATEGORIES[c] in rows]
+        if len(found) < 2:
+            return None
+        slope, offset = np.polyfit(*zip(*found), 1)
+        for c in section:
+            category = CATEGORIES[c]
+            centres[category] = rows[category]["centre"] if category in rows else offset + slope * (c - section[0])
+
+    # Score cells share one column to the right of the widest label
+    left = int(max(line["right"] for line in rows.values())) + 4
+    height = int(np.median([line["height"] for line in rows.values()]) * 1.6)
+    width = image.shape[1] - left
+    if width < 8:
+        return None
+    return {category: (left, int(y - height / 2), width, height) for category, y in centres.items()}
+
+def _load_layouts(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_layout(path: str, key: str, layout: dict):
+    """
+    Adds one layout to the file. Batch workers calibrate concurrently, so the file is
+    re-read right before writing (keeping the other workers' layouts) and replaced
+    atomically (a reader never sees it half-written).
+    """
+    layouts = _load_layouts(path)
+    layouts[key] = layout
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(layouts, f, indent=2)
+    os.replace(tmp, path)
+
+def load_layout(image: np.ndarray, path: str = LAYOUT_PATH):
+    """Cached layout for this scoreboard size, calibrating (and saving) it on first use."""
+    key = f"{image.shape[1]}x{image.shape[0]}"
+    layouts = _load_layouts(path)
+    if key in layouts:
+        return {category: tuple(rect) for category, rect in layouts[key].items()}
+
+    layout = calibrate_scoreboard(image)
+    if layout is not None:
+        _save_layout(path, key, layout)
+        log.info("📐 Calibrated scoreboard layout for %s", key)
+    return layout
 
+class ScoreboardReader:
+    """
+    Per-turn scoreboard reads against a calibrated layout: each score cell is
+    tested for ink and only digit-OCR'd when its pixels changed since last turn.
+    A size that could not be calibrated is not retried, so its turns cost one
+    full-page read (the fallback), not two.
+    """
+
+    def __init__(self, layout_path: str = LAYOUT_PATH):
+        self.layout_path = layout_path
+        self.layout = None
+        self.size = None
+        self.uncalibrated = set()  # frame sizes calibration failed for
+        self.previous = {}  # category -> (cell pixels, value)
+
+    @metrics.timed("detection.scoreboard")
+    def read(self, image):
+        """Returns a GameState for a BGR image or Frame, or None if no layout could be calibrated."""
+        frame = as_frame(image)
+        size = frame.shape[:2]
+        if size != self.size:
+            self.layout = None if size in self.uncalibrated else load_layout(frame.image, self.layout_path)
+            if self.layout is None and size not in self.uncalibrated:
+                log.warning("⚠️ Could not calibrate the scoreboard layout for %dx%d", size[1], size[0])
+                self.uncalibrated.add(size)
+            self.size = size
+            self.previous = {}
+        if self.layout is None:
+            return None
+
+        binary = preprocess_image(frame)
+        state = GameState(open_mask=0)
+        for category, (x, y, w, h) in self.layout.items():
+            cell = binary[max(y, 0):y + h, x:x + w]
+            c = CATEGORY_INDEX[category]
+
+            cached = self.previous.get(category)
+            if cached is not None and np.array_equal(cached[0], cell):
+                value = cached[1]
+            elif np.count_nonzero(cell) < cell.size * EMPTY_INK_RATIO:
+                value = None
+            else:
+                # Digits are dark on light for Tesseract
+                digits = re.sub(r"\D", "", ocr_engine.image_to_string(255 - cell, config=DIGITS_CONFIG))
+                value = int(digits) if digits else None
+            self.previous[category] = (cell.copy(), value)
+
+            if value is None:
+                state.open_mask |= 1 << c
+            else:
+                state.fill(c, value)
+        return state
+
+# Default reader for single-threaded callers; concurrent streams each pass their own
+_reader = ScoreboardReader()
+
+def _full_page_state(image):
+    """Fallback: parse "category score" lines out of full-page OCR text."""
     # Preprocess image for OCR
     processed_image = preprocess_image(image)
 
     # Use Tesseract to extract text
     custom_config = r'--oem 3 --psm 6'
-    extracted_text = pytesseract.image_to_string(processed_image, config=custom_config)
-
-    # Process extracted text into usable data
-    scoreboard_status = {}
-    valid_categories = [
-        "ones", "twos", "threes", "fours", "fives", "sixes",
-        "three_of_a_kind", "four_of_a_kind", "full_house",
-        "small_straight", "large_straight", "yahtzee", "chance"
-    ]
+    extracted_text = ocr_engine.image_to_string(processed_image, config=custom_config)
 
-    lines = extracted_text.lower().split("\n")
+    # Categories OCR does not see stay closed with an EMPTY score
+    state = GameState(open_mask=0)
 
-    for line in lines:
+    for line in extracted_text.lower().split("\n"):
         parts = line.split()
         if len(parts) >= 2:
-            category = parts[0]  # Score category (e.g., "threes", "yahtzee")
+            c = CATEGORY_INDEX.get(parts[0])  # Score category (e.g., "threes", "yahtzee")
             value = parts[1]  # Either a score or blank
 
             # Only add valid categories to the scoreboard data
-            if category in valid_categories:
+            if c is not None:
                 if value.isdigit():
-                    scoreboard_status[category] = int(value)  # Filled score
+                    state.fill(c, int(value))  # Filled score
                 else:
-                    scoreboard_status[category] = "empty"  # Available slot
+                    state.open_mask |= 1 << c  # Available slot
 
-    print(f"📋 Processed Scoreboard Data (cleaned): {scoreboard_status}")
-    return scoreboard_status
+    return state
+
+def extract_game_state(image_path, reader: ScoreboardReader = None):
+    """
+    Reads the scoreboard straight into a compact GameState (open mask + score array).
+    reader holds per-stream state and is not thread-safe: threads each need their own.
+    """
+
+    # Load the image (file path or numpy frame region)
+    image = read_image(image_path)
+    if image is None:
+        log.error("❌ Could not read image: %s", image_path)
+        return GameState(open_mask=0)
+
+    # Calibrated per-cell read; full-page OCR only if the layout is unknown
+    state = (reader or _reader).read(image)
+    if state is None:
+        state = _full_page_state(image)
+    return state
 
+def extract_scoreboard(image_path):
+    """Extracts filled and empty score slots from the scoreboard."""
+    scoreboard_status = extract_game_state(image_path).to_scoreboard()
+
+    log.info("📋 Processed Scoreboard Data (cleaned): %s", scoreboard_status)
+    return scoreboard_status
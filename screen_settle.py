@@ -0,0 +1,80 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+# Readiness detection: instead of sleeping for the worst-case animation time,
+# poll the capture at a high rate and report as soon as the picture stops changing.
+
+DEFAULT_THRESHOLD = 2.0     # mean absolute grey-level change that still counts as "still"
+DEFAULT_STABILITY = 0.25    # seconds the picture must stay still
+DEFAULT_TIMEOUT = 5.0       # give up after this many seconds
+DEFAULT_INTERVAL = 1 / 60   # polling period
+DEFAULT_SCALE = 0.25        # frames are compared downscaled by this factor
+
+log = logging.getLogger(__name__)
+
+
+def thumbnail(frame: np.ndarray, scale: float = DEFAULT_SCALE) -> np.ndarray:
+    """Cheap downscaled grayscale copy used for frame differencing."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    width = max(int(gray.shape[1] * scale), 1)
+    height = max(int(gray.shape[0] * scale), 1)
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class SettleDetector:
+    """
+    Feed it frames with their timestamps; it reports settled once consecutive
+    frames have differed by less than threshold for at least stability seconds.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, stability: float = DEFAULT_STABILITY,
+                 scale: float = DEFAULT_SCALE):
+        self.threshold = threshold
+        self.stability = stability
+        self.scale = scale
+        self.reset()
+
+    def reset(self):
+        self.previous = None
+        self.still_since = None
+        self.last_change = 0.0
+
+    def update(self, frame: np.ndarray, now: float) -> bool:
+        """Adds one frame taken at time now; returns True once the picture has settled."""
+        current = thumbnail(frame, self.scale)
+        if self.previous is None or self.previous.shape != current.shape:
+            self.previous = current
+            self.still_since = now
+            return False
+
+        self.last_change = float(np.abs(current - self.previous).mean())
+        self.previous = current
+        if self.last_change >= self.threshold:
+            self.still_since = now
+            return False
+        return now - self.still_since >= self.stability
+
+
+def wait_until_settled(grab, crop=None, threshold: float = DEFAULT_THRESHOLD,
+                       stability: float = DEFAULT_STABILITY, timeout: float = DEFAULT_TIMEOUT,
+                       interval: float = DEFAULT_INTERVAL, clock=time.monotonic, sleep=time.sleep):
+    """
+    Polls grab() until the frame (or crop(frame), e.g. the dice area) stops changing.
+    Returns (settled, last frame, seconds waited); settled is False on timeout.
+    clock/sleep can be replaced to drive it with synthetic frame sequences.
+    """
+    detector = SettleDetector(threshold, stability)
+    start = clock()
+    frame = None
+    while True:
+        now = clock()
+        frame = grab()
+        if frame is not None and detector.update(crop(frame) if crop else frame, now):
+            return True, frame, now - start
+        if now - start >= timeout:
+            log.warning("⏱️ Screen did not settle within %.1fs (last change %.1f)", timeout, detector.last_change)
+            return False, frame, now - start
+        sleep(interval)
@@ -0,0 +1,319 @@
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+import metrics
+from ai_decision import determine_best_score, determine_dice_to_hold
+from dice_recognition import recognize_dice
+from frame_cache import Frame, as_frame
+from game_state import ALL_OPEN
+from Main import PROFILE, REGIONS, REPLAY_ORIGIN, solve_frame
+from ocr_cache import cache
+from pipeline import DEFAULT_WORKERS
+from region_profiles import window_regions
+from score_analysis import ScoreboardReader, extract_game_state
+from turn_log import TurnRecorder
+from window_capture import ReplayCapture, crop_region
+from yahtzee_solver import awarded_points
+
+# Several game streams driven from one process.
+#
+# A Session bundles a capture source, a region profile, its game state and a
+# turn policy. The Scheduler interleaves sessions on one shared turn pool:
+#   - fair queuing: ready sessions are admitted least-served first (by the
+#     worker time their turns have used), so a slow stream cannot starve others;
+#   - backpressure: a session has at most max_in_flight turns running; a paced
+#     session (interval > 0) that is still busy when its next capture is due
+#     drops that capture instead of queueing stale frames;
+#   - at most max_queued turns are submitted at once, so admission decisions
+#     are made when a worker frees up, not when a long pool queue drains.
+# Turns fan out onto the pipeline's stage pool (word search), which never waits
+# on turns. Identical OCR requests from different sessions are coalesced by the
+# OCR cache, so a screen several streams show at once is only read once.
+
+ROLLS_PER_TURN = 2
+
+log = logging.getLogger(__name__)
+
+
+def word_search_turn(session, frame, bounds):
+    """Solves the word search on screen; keeps the clues, grid and found words as state."""
+    regions = window_regions(bounds, session.profile, grab_window=lambda: frame, required=REGIONS)
+    clues, grid, found = solve_frame(frame, bounds, regions)
+    session.state.update(clues=clues, grid=grid, found={w: bool(m) for w, m in (found or {}).items()})
+    return {"words": len(clues), "found": sum(1 for m in (found or {}).values() if m)}
+
+def yahtzee_turn(session, frame, bounds):
+    """
+    Reads the dice and the scoreboard (the profile's "dice"/"scoreboard" regions, or
+    the whole frame) and decides what to hold, or which category to score after the last roll.
+    The turn goes to the session's recorder, if it has one.
+    """
+    regions = window_regions(bounds, session.profile, grab_window=lambda: frame)
+    frame = frame if isinstance(frame, Frame) else Frame(frame)
+    dice_image = crop_region(frame, bounds, *regions["dice"]) if "dice" in regions else frame
+    board_image = crop_region(frame, bounds, *regions["scoreboard"]) if "scoreboard" in regions else frame
+
+    timings = {"capture": session.capture_ms}
+    start = time.perf_counter()
+    dice = [value for value, _ in recognize_dice(dice_image)]
+    timings["detection.dice"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    reader = session.state.get("reader")
+    if reader is None:
+        reader = session.state["reader"] = ScoreboardReader()
+    board = extract_game_state(board_image, reader)
+    timings["detection.scoreboard"] = (time.perf_counter() - start) * 1000
+
+    # A board with every box open again means a new game started
+    previous = session.state.get("board")
+    if previous is not None and board.open_mask == ALL_OPEN and previous.open_mask != ALL_OPEN:
+        session.state["game"] = session.state.get("game", 0) + 1
+
+    rolls_left = session.state.get("rolls_left", ROLLS_PER_TURN)
+    start = time.perf_counter()
+    if rolls_left > 0:
+        decision = {"hold": determine_dice_to_hold(dice, rolls_left, board)}
+        session.state["rolls_left"] = rolls_left - 1
+    else:
+        decision = {"category": determine_best_score(dice, board)}
+        session.state["rolls_left"] = ROLLS_PER_TURN
+    timings["decision"] = (time.perf_counter() - start) * 1000
+    session.state.update(dice=dice, board=board)
+
+    if session.recorder is not None:
+        category = decision.get("category")
+        # What the game awards (joker rule, bonuses), comparable with simulator records
+        points = awarded_points(dice, category, board) if category and 0 not in dice and len(dice) == 5 else 0
+        session.recorder.record(dice, board, category, points, decision.get("hold"), rolls_left,
+                                timings, session.state.get("game", 0), session.number,
+                                as_frame(dice_image).image if session.snapshots else None)
+    return {"dice": dice, **decision}
+
+POLICIES = {
+    "word_search": word_search_turn,
+    "yahtzee": yahtzee_turn,
+}
+
+
+class Session:
+    """
+    One game stream: capture backend (ScreenCapture or ReplayCapture), region profile,
+    game state (a dict owned by the policy) and policy(session, frame, bounds) -> result.
+    Policies that record turns write them to recorder (a turn_log.TurnRecorder, may be shared).
+    """
+
+    def __init__(self, name: str, capture, policy="word_search", profile: str = None,
+                 interval: float = 0.0, max_in_flight: int = 1, max_turns: int = None,
+                 recorder: TurnRecorder = None, snapshots: bool = False):
+        self.name = name
+        self.number = 0  # session column of recorded turns, assigned by Scheduler.add
+        self.capture = capture
+        self.policy = POLICIES[policy] if isinstance(policy, str) else policy
+        self.profile = profile or (policy if isinstance(policy, str) else PROFILE)
+        self.interval = interval
+        self.max_in_flight = max_in_flight
+        self.max_turns = max_turns
+        self.state = {}
+        self.recorder = recorder
+        self.snapshots = snapshots
+        self.capture_ms = float("nan")
+        self.lock = threading.Lock()  # serializes captures (and state, for max_in_flight > 1)
+        self.frame = None  # reused Frame (one turn at a time only)
+
+        self.in_flight = 0
+        self.turns = 0
+        self.errors = 0
+        self.dropped = 0
+        self.service = 0.0     # worker seconds used, the fair-queuing key
+        self.latencies = []    # admission -> result, seconds
+        self.next_due = 0.0
+        self.exhausted = False
+        self.last = None
+
+    @property
+    def done(self) -> bool:
+        attempted = self.turns + self.errors + self.in_flight
+        return self.exhausted or (self.max_turns is not None and attempted >= self.max_turns)
+
+    def turn(self):
+        """Captures one frame and runs the policy on it; None once the capture source is exhausted."""
+        with self.lock:
+            start = time.perf_counter()
+            bounds = self.capture.bounds()
+            frame = self.capture.grab(bounds) if bounds else None
+            self.capture_ms = (time.perf_counter() - start) * 1000
+        if frame is None:
+            return None
+        if self.max_in_flight == 1:
+            # The previous turn is over, so its derived images become this turn's output buffers
+            self.frame = self.frame.update(frame) if self.frame is not None else Frame(frame)
+            frame = self.frame
+        with metrics.span("session.turn"):
+            return self.policy(self, frame, bounds)
+
+
+class Scheduler:
+    """Runs many sessions on one shared turn pool with fair queuing and per-session backpressure."""
+
+    def __init__(self, sessions=(), workers: int = DEFAULT_WORKERS, max_queued: int = None):
+        self.sessions = []
+        self.workers = workers
+        self.max_queued = max_queued or workers
+        self.elapsed = 0.0
+        for session in sessions:
+            self.add(session)
+
+    def add(self, session: Session) -> Session:
+        """Adds a session, numbering it in the order added (its session column in the turn log)."""
+        session.number = len(self.sessions)
+        self.sessions.append(session)
+        return session
+
+    @staticmethod
+    def _turn(session: Session):
+        start = time.perf_counter()
+        try:
+            return session.turn(), None, time.perf_counter() - start
+        except Exception as exc:
+            log.exception("❌ Session %s: turn failed", session.name)
+            return None, exc, time.perf_counter() - start
+
+    def _admit(self, now: float, running: dict, pool):
+        """Starts turns for due sessions, least-served first, until max_queued are running."""
+        for session in self.sessions:
+            # A paced session still busy at its next capture skips that capture
+            if session.interval > 0 and now >= session.next_due and session.in_flight >= session.max_in_flight:
+                session.dropped += 1
+                session.next_due = now + session.interval
+        ready = [s for s in self.sessions
+                 if not s.done and s.in_flight < s.max_in_flight and now >= s.next_due]
+        for session in sorted(ready, key=lambda s: s.service)[:self.max_queued - len(running)]:
+            session.in_flight += 1
+            session.next_due = now + session.interval
+            running[pool.submit(self._turn, session)] = (session, now)
+
+    def _next_due(self, now: float):
+        """Seconds until an idle session becomes due (None if none is waiting on its interval)."""
+        waiting = [s.next_due for s in self.sessions
+                   if not s.done and s.in_flight < s.max_in_flight and s.next_due > now]
+        return max(min(waiting) - now, 0.0) if waiting else None
+
+    def run(self, duration: float = None) -> dict:
+        """Runs until every session is done (or duration seconds passed) and returns stats()."""
+        start = time.monotonic()
+        deadline = start + duration if duration else None
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="session") as pool:
+            while True:
+                now = time.monotonic()
+                if deadline is None or now < deadline:
+                    self._admit(now, running, pool)
+                if not running:
+                    pause = self._next_due(now)
+                    if pause is None or (deadline is not None and now + pause >= deadline):
+                        break
+                    time.sleep(pause)
+                    continue
+
+                finished, _ = wait(running, timeout=self._next_due(now), return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for future in finished:
+                    session, admitted = running.pop(future)
+                    result, error, service = future.result()
+                    session.in_flight -= 1
+                    session.service += service
+                    if error is not None:
+                        session.errors += 1
+                    elif result is None:
+                        session.exhausted = True
+                    else:
+                        session.turns += 1
+                        session.latencies.append(now - admitted)
+                        session.last = result
+        self.elapsed = time.monotonic() - start
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Per-session and overall turn counts, latency percentiles (ms) and throughput."""
+        per_session = {}
+        for s in self.sessions:
+            latencies = np.array(s.latencies) * 1000
+            per_session[s.name] = {
+                "turns": s.turns, "errors": s.errors, "dropped": s.dropped,
+                "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else None,
+            }
+        turns = [s.turns for s in self.sessions]
+        everything = np.concatenate([s.latencies for s in self.sessions]) * 1000 if any(turns) else np.array([])
+        return {
+            "sessions": per_session,
+            "turns": sum(turns),
+            "seconds": self.elapsed,
+            "turns_per_second": sum(turns) / self.elapsed if self.elapsed else 0.0,
+            "min_turns": min(turns, default=0),
+            "max_turns": max(turns, default=0),
+            "p50_ms": float(np.percentile(everything, 50)) if len(everything) else None,
+            "p95_ms": float(np.percentile(everything, 95)) if len(everything) else None,
+            "ocr_cache": cache.stats(),
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive several game sessions from one process (replay load test).")
+    parser.add_argument("--replay", nargs="+", metavar="FRAME", required=True,
+                        help="Screenshots (file, folder or glob) every session replays.")
+    parser.add_argument("--sessions", type=int, default=8, help="Number of simultaneous sessions.")
+    parser.add_argument("--policy", default="word_search", choices=sorted(POLICIES))
+    parser.add_argument("--profile", help="Region profile (default: the policy's).")
+    parser.add_argument("--origin", default=",".join(map(str, REPLAY_ORIGIN)),
+                        help="Window x,y in screen points that replayed frames were captured at.")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session.")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between captures per session (0 = flat out).")
+    parser.add_argument("--duration", type=float, help="Stop admitting turns after this many seconds.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Turn pool size shared by all sessions.")
+    parser.add_argument("--record", metavar="PATH", help="Append recorded turns (yahtzee) to a turn log.")
+    parser.add_argument("--snapshots", action="store_true", help="Also keep deduplicated dice ROI snapshots.")
+    parser.add_argument("--no-ocr-cache", action="store_true",
+                        help="Keep no OCR results between turns (identical in-flight reads are still coalesced).")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    if args.no_ocr_cache:
+        cache.max_entries = 0
+
+    origin = tuple(int(v) for v in args.origin.split(","))
+    recorder = TurnRecorder(args.record, snapshots=args.snapshots) if args.record else None
+    scheduler = Scheduler(workers=args.workers)
+    for n in range(args.sessions):
+        scheduler.add(Session(f"session-{n}", ReplayCapture(args.replay, origin=origin), args.policy,
+                              args.profile, args.interval, max_turns=args.turns,
+                              recorder=recorder, snapshots=args.snapshots))
+    stats = scheduler.run(args.duration)
+    if recorder:
+        recorder.close()
+
+    print(f"🎮 {args.sessions} sessions x {args.policy}: {stats['turns']} turns in {stats['seconds']:.2f}s "
+          f"({stats['turns_per_second']:.1f} turns/s), turns per session {stats['min_turns']}-{stats['max_turns']}")
+    if stats["p50_ms"] is not None:
+        print(f"⏱️ Turn latency p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+    ocr = stats["ocr_cache"]
+    print(f"🔤 OCR: {ocr['misses']} engine calls, {ocr['coalesced']} coalesced across sessions, "
+          f"{ocr['memory_hits'] + ocr['disk_hits']} cache hits")
+    failed = sum(s["errors"] for s in stats["sessions"].values())
+    dropped = sum(s["dropped"] for s in stats["sessions"].values())
+    if failed or dropped:
+        print(f"⚠️ {failed} failed turns, {dropped} dropped captures")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,233 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game_state import ALL_OPEN, CATEGORY_INDEX, EMPTY, NUM_CATEGORIES, ROLLS, SCORE_TABLE
+from turn_log import TURN_DTYPE, TurnRecorder
+from yahtzee_solver import (
+    JOKER_SCORES, IS_YAHTZEE, TRANSITIONS, HOLDS,
+    UPPER_CAP, UPPER_BONUS, YAHTZEE_BONUS, category_totals, load_values
+)
+
+# Headless Yahtzee simulator: plays whole batches of games at once with NumPy
+# using the same scoring rules as ai_decision, so strategies can be compared
+# for quality and speed without a phone.
+
+YAHTZEE = CATEGORY_INDEX["yahtzee"]
+OPEN_BITS = 1 << np.arange(NUM_CATEGORIES)
+HOLD_BITS = ((np.arange(32)[:, None] >> np.arange(5)) & 1).astype(bool)
+
+# Sorted dice encoded base 6 -> index into ROLLS.
+_POWERS = 6 ** np.arange(5)
+CODE_TO_ROLL = np.full(6 ** 5, -1, dtype=np.int64)
+CODE_TO_ROLL[(np.array(ROLLS) - 1) @ _POWERS] = np.arange(len(ROLLS))
+
+
+def roll_indices(dice: np.ndarray) -> np.ndarray:
+    """Index into ROLLS for every row of a sorted (n, 5) dice array."""
+    return CODE_TO_ROLL[(dice - 1) @ _POWERS]
+
+
+class GreedyStrategy:
+    """The original determine_best_score rule: never reroll, take the highest immediate score."""
+
+    def holds(self, dice, rolls_left, open_mask, upper, bonus):
+        return np.full(len(dice), 31)
+
+    def categories(self, dice, open_mask, upper, bonus):
+        scores = np.where(open_mask[:, None] & OPEN_BITS, SCORE_TABLE[roll_indices(dice)], -1)
+        return scores.argmax(axis=1)
+
+
+class OptimalStrategy:
+    """Expected-value play from the solved value table (yahtzee_solver + reroll_engine)."""
+
+    def __init__(self):
+        self.values = load_values()
+
+    def _groups(self, open_mask, upper, bonus):
+        """Yields (rows, open mask, uppers, bonuses, state of each row) per distinct open mask."""
+        keys = (open_mask * (UPPER_CAP + 1) + upper) * 2 + bonus
+        unique, inverse = np.unique(keys, return_inverse=True)
+        masks = unique // (2 * (UPPER_CAP + 1))
+        for mask in np.unique(masks):
+            states = np.nonzero(masks == mask)[0]
+            rows = np.nonzero(np.isin(inverse, states))[0]
+            local = np.searchsorted(states, inverse[rows])
+            yield rows, int(mask), unique[states] // 2 % (UPPER_CAP + 1), unique[states] % 2, local
+
+    def holds(self, dice, rolls_left, open_mask, upper, bonus):
+        r = roll_indices(dice)
+        result = np.empty(len(dice), dtype=np.int64)
+        for rows, mask, uppers, bonuses, local in self._groups(open_mask, upper, bonus):
+            value = category_totals(mask, uppers, bonuses, self.values).max(axis=2)
+            for _ in range(rolls_left - 1):
+                value = (value @ TRANSITIONS.T)[:, HOLDS].max(axis=2)
+            keep_values = value @ TRANSITIONS.T
+            result[rows] = keep_values[local[:, None], HOLDS[r[rows]]].argmax(axis=1)
+        return result
+
+    def categories(self, dice, open_mask, upper, bonus):
+        r = roll_indices(dice)
+        result = np.empty(len(dice), dtype=np.int64)
+        for rows, mask, uppers, bonuses, local in self._groups(open_mask, upper, bonus):
+            totals = category_totals(mask, uppers, bonuses, self.values)
+            result[rows] = totals[local, r[rows]].argmax(axis=1)
+        return result
+
+
+STRATEGIES = {
+    "greedy": GreedyStrategy,
+    "optimal": OptimalStrategy,
+}
+
+
+def _roll(rng, dice, hold_mask):
+    """Rerolls every die not selected by hold_mask and re-sorts each row."""
+    fresh = rng.integers(1, 7, size=dice.shape)
+    return np.sort(np.where(HOLD_BITS[hold_mask], dice, fresh), axis=1)
+
+
+def play_games(strategy, n_games: int, rng: np.random.Generator, record: bool = False):
+    """
+    Plays n_games complete games side by side. Returns the final scores, or with record
+    (scores, TURN_DTYPE records): one per scored turn, game by game, bonuses included in points.
+    """
+    open_mask = np.full(n_games, ALL_OPEN, dtype=np.int64)
+    upper = np.zeros(n_games, dtype=np.int64)
+    bonus = np.zeros(n_games, dtype=np.int64)
+    total = np.zeros(n_games, dtype=np.int64)
+    if record:
+        records = np.zeros((n_games, NUM_CATEGORIES), TURN_DTYPE)
+        records["game"] = np.arange(n_games)[:, None]
+        records["hold"] = records["snapshot"] = -1
+        records["timings_ms"] = np.nan
+        scores = np.full((n_games, NUM_CATEGORIES), EMPTY, dtype=np.int16)
+        games = np.arange(n_games)
+
+    for turn in range(NUM_CATEGORIES):
+        capped = np.minimum(upper, UPPER_CAP)
+        dice = _roll(rng, np.zeros((n_games, 5), dtype=np.int64), np.zeros(n_games, dtype=np.int64))
+        for rolls_left in (2, 1):
+            dice = _roll(rng, dice, strategy.holds(dice, rolls_left, open_mask, capped, bonus))
+
+        category = strategy.categories(dice, open_mask, capped, bonus)
+        r = roll_indices(dice)
+        yahtzee_filled = (open_mask >> YAHTZEE & 1) == 0
+        points = np.where(yahtzee_filled, JOKER_SCORES[r, category], SCORE_TABLE[r, category])
+
+        gained = points + YAHTZEE_BONUS * (bonus & IS_YAHTZEE[r])
+        is_upper = category < 6
+        crossed = is_upper & (upper < UPPER_CAP) & (upper + points >= UPPER_CAP)
+        gained += UPPER_BONUS * crossed
+        total += gained
+        if record:
+            rows = records[:, turn]
+            rows["dice"] = dice
+            rows["open_mask"] = open_mask
+            rows["scores"] = scores
+            rows["category"] = category
+            rows["points"] = gained
+            scores[games, category] = points
+        upper += np.where(is_upper, points, 0)
+        bonus = np.where(category == YAHTZEE, IS_YAHTZEE[r], bonus)
+        open_mask = open_mask & ~(1 << category)
+
+    if record:
+        records["time"] = time.time()
+        return total, records.reshape(-1)
+    return total
+
+
+def _worker(strategy_name: str, n_games: int, seed: np.random.SeedSequence, record: bool = False):
+    """Process-pool entry point: one batch with its own RNG stream."""
+    return play_games(STRATEGIES[strategy_name](), n_games, np.random.default_rng(seed), record)
+
+
+def simulate(strategy_name: str, n_games: int, workers: int = None, batch_size: int = 2000, seed: int = 0,
+             record_path: str = None):
+    """
+    Runs n_games across a process pool in batches of batch_size.
+    Every batch gets an independent RNG spawned from seed, so results are reproducible.
+    With record_path, every scored turn is appended to that turn log (see turn_log).
+    Returns (scores, elapsed seconds).
+    """
+    # Instantiate once up front so a missing value table is solved here, not in every worker.
+    STRATEGIES[strategy_name]()
+
+    sizes = [batch_size] * (n_games // batch_size)
+    if n_games % batch_size:
+        sizes.append(n_games % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    record = record_path is not None
+
+    start = time.perf_counter()
+    batches = []
+    # A new run in the log: game numbers restart at 0 without colliding with earlier runs
+    recorder = TurnRecorder(record_path) if record else None
+    next_game = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_worker, [strategy_name] * len(sizes), sizes, seeds, [record] * len(sizes)):
+            if record:
+                scores, records = result
+                records["game"] += next_game
+                next_game += len(scores)
+                recorder.append(records)
+                result = scores
+            batches.append(result)
+    if recorder:
+        recorder.close()
+    elapsed = time.perf_counter() - start
+    return np.concatenate(batches), elapsed
+
+
+def summarize(scores: np.ndarray, elapsed: float) -> dict:
+    """Mean, spread, percentiles and throughput of a simulation run."""
+    p5, p25, p50, p75, p95 = np.percentile(scores, [5, 25, 50, 75, 95])
+    return {
+        "games": int(len(scores)),
+        "mean": float(scores.mean()),
+        "std": float(scores.std()),
+        "min": int(scores.min()),
+        "p5": float(p5), "p25": float(p25), "p50": float(p50), "p75": float(p75), "p95": float(p95),
+        "max": int(scores.max()),
+        "seconds": elapsed,
+        "games_per_second": len(scores) / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Yahtzee strategies with simulated games.")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="greedy")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-mean", type=float, default=None, help="Fail if the mean score is lower.")
+    parser.add_argument("--min-rate", type=float, default=None, help="Fail if games/second is lower.")
+    parser.add_argument("--record", metavar="PATH", help="Append every scored turn to a turn log (see turn_log.py).")
+    args = parser.parse_args()
+
+    scores, elapsed = simulate(args.strategy, args.games, args.workers, args.batch_size, args.seed, args.record)
+    stats = summarize(scores, elapsed)
+
+    print(f"🎲 {args.strategy}: {stats['games']} games in {stats['seconds']:.2f}s "
+          f"({stats['games_per_second']:.0f} games/s)")
+    print(f"📊 mean {stats['mean']:.2f} ± {stats['std']:.2f} | "
+          f"p5 {stats['p5']:.0f} p50 {stats['p50']:.0f} p95 {stats['p95']:.0f} | "
+          f"min {stats['min']} max {stats['max']}")
+
+    failed = False
+    if args.min_mean is not None and stats["mean"] < args.min_mean:
+        print(f"❌ Mean score {stats['mean']:.2f} below {args.min_mean}")
+        failed = True
+    if args.min_rate is not None and stats["games_per_second"] < args.min_rate:
+        print(f"❌ Throughput {stats['games_per_second']:.0f} games/s below {args.min_rate}")
+        failed = True
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+
+from game_state import CATEGORIES
+
+# Synthetic game images with known content, shared by the benchmark and the
+# tests. Only OpenCV and NumPy: no OCR, no capture.
+
+PIPS = {1: [(1, 1)], 2: [(0, 0), (2, 2)], 3: [(0, 0), (1, 1), (2, 2)],
+        4: [(0, 0), (0, 2), (2, 0), (2, 2)], 5: [(0, 0), (0, 2), (1, 1), (2, 0), (2, 2)],
+        6: [(0, 0), (1, 0), (2, 0), (0, 2), (1, 2), (2, 2)]}
+
+
+def scaled(image: np.ndarray, scale: int) -> np.ndarray:
+    """Synthetic larger variant of a fixture (same content, scale times the pixels)."""
+    if scale == 1:
+        return image.copy()
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+def render_dice(values, scale: int = 1) -> np.ndarray:
+    """Synthetic roll area: white dice with dark pips on green felt."""
+    image = np.full((120, 600, 3), (60, 120, 40), np.uint8)
+    for i, value in enumerate(values):
+        x0 = i * 120 + 10
+        cv2.rectangle(image, (x0, 10), (x0 + 100, 110), (250, 250, 250), -1)
+        for row, col in PIPS[value]:
+            cv2.circle(image, (x0 + 20 + col * 30, 30 + row * 30), 9, (20, 20, 20), -1)
+    return scaled(image, scale)
+
+def render_scoreboard(scores, scale: int = 1) -> np.ndarray:
+    """Synthetic scoreboard: one "label  score" line per category, None leaves the cell empty."""
+    image = np.full((13 * 40 + 40, 420, 3), 255, np.uint8)
+    for i, (category, score) in enumerate(zip(CATEGORIES, scores)):
+        y = 30 + i * 40 + (20 if i >= 6 else 0)
+        cv2.putText(image, category.replace("_", " ").title(), (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+        if score is not None:
+            cv2.putText(image, str(score), (320, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    return scaled(image, scale)
@@ -0,0 +1,41 @@
+import cv2
+import pytest
+
+import dice_recognition
+from dice_recognition import load_templates, recognize_dice
+from synthetic import render_dice
+
+ROLLS = [[1, 2, 3, 4, 5], [6, 6, 6, 6, 6], [2, 4, 6, 1, 3], [5, 1, 5, 1, 5]]
+
+
+@pytest.fixture
+def no_templates(monkeypatch):
+    monkeypatch.setattr(dice_recognition, "_templates", {})
+
+
+@pytest.mark.parametrize("values", ROLLS)
+@pytest.mark.parametrize("scale", [1, 2])
+def test_pip_counting_reads_rendered_dice(no_templates, values, scale):
+    assert [value for value, _ in recognize_dice(render_dice(values, scale))] == values
+
+
+def test_empty_slots_read_as_zero(no_templates):
+    results = recognize_dice(render_dice([3, 5]))
+    assert [value for value, _ in results] == [3, 5, 0, 0, 0]
+    assert all(confidence > 0 for _, confidence in results[2:])
+
+
+def test_templates_load_and_classify(tmp_path, monkeypatch):
+    for value in range(1, 7):
+        # One rendered die face per template file, like a crop of a real screenshot
+        cv2.imwrite(str(tmp_path / f"die_{value}.png"), render_dice([value])[:, :120])
+    templates = load_templates(str(tmp_path))
+    assert sorted(templates) == [1, 2, 3, 4, 5, 6]
+
+    monkeypatch.setattr(dice_recognition, "_templates", templates)
+    for values in ROLLS:
+        assert [value for value, _ in recognize_dice(render_dice(values))] == values
+
+
+def test_missing_templates_folder(tmp_path):
+    assert load_templates(str(tmp_path / "missing")) == {}
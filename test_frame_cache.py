@@ -0,0 +1,75 @@
+import numpy as np
+
+from frame_cache import Frame, preprocess_image
+
+
+def image(seed: int = 0, shape=(60, 80, 3)) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def test_results_are_memoized():
+    frame = Frame(image())
+    calls = []
+
+    def compute(f, dst):
+        calls.append(dst)
+        return f.gray() // 2
+
+    first = frame.derive("half", compute)
+    assert frame.derive("half", compute) is first
+    assert len(calls) == 1
+    assert frame.gray() is frame.gray()
+    assert frame.binary_inv(150) is preprocess_image(frame)
+
+
+def test_roi_slices_pointwise_results_from_parent():
+    frame = Frame(image())
+    roi = frame.roi(10, 5, 30, 20)
+    assert roi.parent is frame
+    assert np.shares_memory(roi.gray(), frame.gray())
+    assert np.array_equal(roi.binary_inv(), frame.binary_inv()[5:25, 10:40])
+    assert frame.roi(10, 5, 30, 20) is roi
+
+
+def test_nested_roi_slices_from_root():
+    frame = Frame(image())
+    inner = frame.roi(10, 5, 40, 30).roi(4, 3, 12, 10)
+    assert inner.parent is frame
+    assert inner.rect == (14, 8, 12, 10)
+    assert np.array_equal(inner.image, frame.image[8:18, 14:26])
+    assert np.shares_memory(inner.above(100), frame.above(100))
+    assert np.array_equal(inner.above(100), frame.above(100)[8:18, 14:26])
+
+
+def test_neighbourhood_results_are_computed_on_the_roi():
+    frame = Frame(image())
+    roi = frame.roi(10, 5, 30, 20)
+    adaptive = roi.adaptive(11, 2)
+    assert adaptive.shape == (20, 30)
+    assert not np.shares_memory(adaptive, frame.adaptive(11, 2))
+
+
+def test_update_invalidates_and_reuses_buffers():
+    frame = Frame(image(0))
+    roi = frame.roi(0, 0, 10, 10)
+    old_gray = frame.gray()
+    old_values = old_gray.copy()
+
+    new = image(1)
+    assert frame.update(new) is frame
+    gray = frame.gray()
+    # Recomputed for the new capture, into the previous result's buffer
+    assert gray is old_gray
+    assert not np.array_equal(gray, old_values)
+    assert np.array_equal(gray, Frame(new).gray())
+    # ROI views belong to the old capture
+    assert frame.roi(0, 0, 10, 10) is not roi
+
+
+def test_update_never_recycles_the_capture():
+    gray_capture = image(0, (40, 40))
+    frame = Frame(gray_capture)
+    assert frame.gray() is gray_capture
+    frame.update(image(1, (40, 40)))
+    frame.binary_inv()
+    assert np.array_equal(gray_capture, image(0, (40, 40)))
@@ -0,0 +1,106 @@
+import numpy as np
+
+from screen_settle import SettleDetector, wait_until_settled
+
+INTERVAL = 1 / 32  # exact in binary, so sums of intervals compare exactly
+
+
+def still(level: int = 100) -> np.ndarray:
+    return np.full((40, 40, 3), level, np.uint8)
+
+
+class FakeClock:
+    """Synthetic time: sleep() advances it instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps += 1
+        self.now += seconds
+
+
+def frames(sequence):
+    """grab() returning the frames of sequence in turn, then repeating the last one."""
+    sequence = list(sequence)
+    return lambda: sequence.pop(0) if len(sequence) > 1 else sequence[0]
+
+
+def test_settles_after_stable_frames():
+    detector = SettleDetector(stability=4 * INTERVAL)
+    results = [detector.update(still(), i * INTERVAL) for i in range(6)]
+    # First frame has nothing to compare to; stillness must then last 4 intervals
+    assert results == [False, False, False, False, True, True]
+
+
+def test_change_resets_stability():
+    detector = SettleDetector(stability=4 * INTERVAL)
+    for i in range(4):
+        assert not detector.update(still(), i * INTERVAL)
+    # A big change restarts the stability window
+    assert not detector.update(still(200), 4 * INTERVAL)
+    assert detector.last_change > detector.threshold
+    assert not detector.update(still(200), 7 * INTERVAL)
+    assert detector.update(still(200), 8 * INTERVAL)
+
+
+def test_small_noise_counts_as_still():
+    detector = SettleDetector(stability=2 * INTERVAL)
+    detector.update(still(100), 0.0)
+    detector.update(still(101), INTERVAL)
+    assert detector.update(still(100), 2 * INTERVAL)
+
+
+def test_frame_size_change_resets():
+    detector = SettleDetector(stability=2 * INTERVAL)
+    detector.update(still(), 0.0)
+    detector.update(still(), INTERVAL)
+    assert not detector.update(np.full((80, 80, 3), 100, np.uint8), 2 * INTERVAL)
+
+
+def test_wait_until_settled_after_animation():
+    clock = FakeClock()
+    animation = [still(level) for level in range(0, 250, 50)]  # 5 changing frames, then still
+    settled, frame, waited = wait_until_settled(frames(animation), stability=4 * INTERVAL, interval=INTERVAL,
+                                                clock=clock, sleep=clock.sleep)
+    assert settled
+    assert frame is animation[-1]
+    assert waited == (4 + 4) * INTERVAL
+
+
+def test_wait_until_settled_uses_crop():
+    clock = FakeClock()
+    counter = iter(range(1000))
+
+    def grab():
+        # Only the right half keeps changing
+        frame = still()
+        frame[:, 20:] = next(counter) * 10 % 256
+        return frame
+
+    settled, _, _ = wait_until_settled(grab, crop=lambda f: f[:, :20], stability=4 * INTERVAL, interval=INTERVAL,
+                                       clock=clock, sleep=clock.sleep)
+    assert settled
+
+
+def test_wait_until_settled_times_out():
+    clock = FakeClock()
+    levels = iter(range(1000))
+    settled, frame, waited = wait_until_settled(lambda: still(next(levels) * 40 % 256), timeout=1.0,
+                                                interval=INTERVAL, clock=clock, sleep=clock.sleep)
+    assert not settled
+    assert frame is not None
+    assert 1.0 <= waited < 1.0 + INTERVAL + 1e-9
+    assert clock.sleeps == round(1.0 / INTERVAL)
+
+
+def test_wait_until_settled_skips_missing_frames():
+    clock = FakeClock()
+    sequence = [None, None, still(), still()]
+    settled, _, _ = wait_until_settled(frames(sequence), stability=2 * INTERVAL, interval=INTERVAL,
+                                       clock=clock, sleep=clock.sleep)
+    assert settled
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from text_index import TextIndex, _rect_distance
+
+
+def random_boxes(rng, count, span=2000):
+    return [(f"w{i}", rng.randrange(span), rng.randrange(span), rng.randrange(1, 200), rng.randrange(1, 60), 90)
+            for i in range(count)]
+
+
+def brute_force(boxes, x, y, k, max_distance):
+    distances = sorted(_rect_distance(box, x, y) for box in boxes)
+    return [d for d in distances[:k] if d <= max_distance]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_matches_brute_force(seed):
+    rng = random.Random(seed)
+    index = TextIndex(random_boxes(rng, 300))
+    # Drop some boxes so the grid has holes and the occupied range shrinks
+    for box_id in rng.sample(sorted(index.boxes), 100):
+        index.remove(box_id)
+    boxes = list(index)
+    for _ in range(200):
+        x, y = rng.uniform(-3000, 5000), rng.uniform(-3000, 5000)
+        k = rng.randrange(1, 6)
+        max_distance = rng.choice([float("inf"), rng.uniform(0, 500)])
+        found = index.nearest(x, y, k, max_distance)
+        # Compared by distance: equally distant boxes may come back in either order
+        assert [_rect_distance(b, x, y) for b in found] == brute_force(boxes, x, y, k, max_distance)
+
+
+def test_nearest_far_outside_the_boxes():
+    index = TextIndex([("HOUSE", 10, 10, 50, 20, 90), ("GLASS", 100, 10, 50, 20, 90)])
+    assert [b.text for b in index.nearest(10000, 10000)] == ["GLASS"]
+    assert index.nearest(10000, 10000, max_distance=100) == []
+
+
+def test_nearest_on_empty_index():
+    assert TextIndex().nearest(0, 0) == []
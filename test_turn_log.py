@@ -0,0 +1,91 @@
+import numpy as np
+
+from game_state import CATEGORY_INDEX, GameState
+from turn_log import SNAPSHOT_DTYPE, TURN_DTYPE, SnapshotStore, TurnRecorder, game_scores, load_snapshot, \
+    load_turns, summarize
+
+
+def board() -> GameState:
+    return GameState()
+
+
+def test_each_recorder_is_a_new_run(tmp_path):
+    path = str(tmp_path / "turns.bin")
+    for _ in range(3):
+        with TurnRecorder(path, chunk_size=4) as recorder:
+            for session in range(2):
+                recorder.record([1, 2, 3, 4, 5], board(), "chance", 15, session=session)
+    turns = load_turns(path)
+    assert turns["run"].tolist() == [0, 0, 1, 1, 2, 2]
+    assert turns["session"].tolist() == [0, 1] * 3
+
+
+def test_torn_record_is_trimmed(tmp_path):
+    path = str(tmp_path / "turns.bin")
+    with TurnRecorder(path) as recorder:
+        recorder.record([6, 6, 6, 6, 6], board(), "yahtzee", 50)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (TURN_DTYPE.itemsize // 2))  # killed mid-write
+    with TurnRecorder(path) as recorder:
+        assert recorder.turns == 1
+        recorder.record([1, 1, 1, 2, 2], board(), "full_house", 25)
+    turns = load_turns(path)
+    assert turns["points"].tolist() == [50, 25]
+    assert turns["run"].tolist() == [0, 1]
+
+
+def test_snapshots_are_stored_once(tmp_path):
+    path = str(tmp_path / "turns.bin")
+    dice = np.random.default_rng(0).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    gray = dice[:, :, 0].copy()
+    with TurnRecorder(path, snapshots=True) as recorder:
+        for image in (dice, dice.copy(), gray, dice):
+            recorder.record([1, 2, 3, 4, 5], board(), snapshot=image)
+    turns = load_turns(path)
+    assert turns["snapshot"].tolist() == [0, 0, 1, 0]
+    assert np.array_equal(load_snapshot(path, 0), dice)
+    assert np.array_equal(load_snapshot(path, 1), gray)
+
+
+def test_snapshot_index_past_the_blob_is_dropped(tmp_path):
+    path = str(tmp_path / "dice.snap")
+    images = [np.full((4, 5), value, np.uint8) for value in (1, 2)]
+    store = SnapshotStore(path)
+    assert [store.add(image) for image in images] == [0, 1]
+    store.close()
+    # A crash after the second entry's index write but before its pixels reached the file
+    with open(path, "rb+") as f:
+        f.truncate(images[0].size + 3)
+
+    store = SnapshotStore(path)
+    assert len(store.ids) == 1
+    assert store.add(images[0]) == 0
+    assert store.add(images[1]) == 1
+    store.close()
+    index = np.fromfile(f"{path}idx", SNAPSHOT_DTYPE)
+    assert index["offset"].tolist() == [0, images[0].size]
+
+
+def test_game_scores_and_summary(tmp_path):
+    path = str(tmp_path / "turns.bin")
+    with TurnRecorder(path) as recorder:
+        # Run 0: session 0 plays games 0 and 1, session 1 plays game 0
+        recorder.record([1, 2, 3, 4, 5], board(), "large_straight", 40, game=0, session=0, timings={"decision": 2.0})
+        recorder.record([2, 2, 2, 3, 3], board(), None, 0, hold=[True] * 3 + [False] * 2, rolls_left=1)
+        recorder.record([6, 6, 6, 6, 6], board(), "yahtzee", 50, game=0, session=0, timings={"decision": 4.0})
+        recorder.record([1, 1, 1, 1, 1], board(), "ones", 5, game=1, session=0)
+        recorder.record([3, 3, 3, 4, 4], board(), "full_house", 25, game=0, session=1)
+    with TurnRecorder(path) as recorder:
+        # Same session and game numbers in a new run stay a separate game
+        recorder.record([2, 3, 4, 5, 6], board(), "chance", 20, game=0, session=0)
+
+    turns = load_turns(path)
+    scored = turns[turns["category"] >= 0]
+    assert game_scores(scored).tolist() == [90, 5, 25, 20]
+
+    stats = summarize(turns)
+    assert (stats["turns"], stats["runs"], stats["scored_turns"], stats["games"]) == (6, 2, 5, 4)
+    assert stats["max_score"] == 90
+    assert stats["categories"]["yahtzee"] == 1
+    assert turns["category"][2] == CATEGORY_INDEX["yahtzee"]
+    assert stats["latency"]["decision"]["max_ms"] == 4.0
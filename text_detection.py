@@ -1,45 +1,75 @@
 import cv2
-import pytesseract
+import logging
 import os
 
-# If Tesseract is not in PATH, point to its install location:
-# pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"
+import metrics
+import ocr_engine
+from frame_cache import as_frame
+from text_index import TextIndex
+from window_capture import read_image
 
+log = logging.getLogger(__name__)
 
-def detect_text_bounding_boxes(image_path: str):
+
+@metrics.timed("detection.text")
+def detect_text_bounding_boxes(image_path):
     """
     Uses Tesseract's 'image_to_data' to get bounding boxes for all recognized text.
+    Accepts a file path or a numpy frame region.
     Returns a list of (text, x, y, w, h, conf).
     """
-    if not os.path.exists(image_path):
-        print(f"❌ Image not found: {image_path}")
+    if isinstance(image_path, str) and not os.path.exists(image_path):
+        log.error("❌ Image not found: %s", image_path)
         return []
 
-    image = cv2.imread(image_path)
+    image = read_image(image_path)
     if image is None:
-        print(f"❌ Could not read: {image_path}")
+        log.error("❌ Could not read: %s", image_path)
         return []
 
+    return _ocr_boxes(as_frame(image).image)
+
+def _ocr_boxes(image, offset=(0, 0)):
+    """(text, x, y, w, h, conf) of confident words in image, shifted by offset."""
     # Optionally preprocess image for better OCR:
     # gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     # Invert or threshold if text is too faint...
     # For now, let's pass the raw image.
 
     # Tesseract can parse bounding boxes using 'image_to_data' with '--psm 6' for block-based
-    data = pytesseract.image_to_data(image, config="--psm 6", output_type=pytesseract.Output.DICT)
+    data = ocr_engine.image_to_data(image, config="--psm 6")
 
+    dx, dy = offset
     results = []
     for i in range(len(data["text"])):
         text = data["text"][i].strip()
-        conf = int(data["conf"][i])
+        conf = int(float(data["conf"][i]))
         x = data["left"][i]
         y = data["top"][i]
         w = data["width"][i]
         h = data["height"][i]
 
         if conf > 50 and text != "":  # confidence threshold, skip empty
-            results.append((text, x, y, w, h, conf))
+            results.append((text, x + dx, y + dy, w, h, conf))
 
     return results
+
+@metrics.timed("detection.text")
+def detect_text_index(image_path, index: TextIndex = None, region=None) -> TextIndex:
+    """
+    Like detect_text_bounding_boxes, but returns a TextIndex for nearest / within / label queries.
+    With an existing index and region=(x, y, w, h), only that part of the frame is re-OCRed
+    and the index is updated in place.
+    """
+    image = read_image(image_path)
+    if image is None:
+        log.error("❌ Could not read: %s", image_path)
+        return index if index is not None else TextIndex()
+    image = as_frame(image).image
+
+    if index is None or region is None:
+        return TextIndex(_ocr_boxes(image))
+
+    x, y, w, h = region
+    index.replace_region(region, _ocr_boxes(image[y:y + h, x:x + w], offset=(x, y)))
+    return index
@@ -0,0 +1,238 @@
+import re
+from collections import namedtuple
+
+# Spatial + text index over OCR word boxes, so click targets ("FULL HOUSE",
+# "the word nearest this point") are resolved without rescanning the list or
+# re-running OCR.
+#
+# Boxes live in a uniform grid of CELL-pixel buckets (every bucket a box
+# overlaps lists it) and in a hash of normalized text. Fuzzy lookups use a
+# one-deletion neighbourhood of every key, so a distance-1 query is a few dict
+# probes. replace_region() swaps in the boxes of a re-OCRed part of the frame.
+
+CELL = 64
+
+TextBox = namedtuple("TextBox", "text x y w h conf")
+
+
+def normalize(text: str) -> str:
+    """Case- and punctuation-insensitive form used for label lookups."""
+    return re.sub(r"[^0-9A-Z]", "", text.upper())
+
+def _deletions(key: str) -> set:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def _rect_distance(box: TextBox, x: float, y: float) -> float:
+    """Distance from a point to a box (0 inside it)."""
+    dx = max(box.x - x, 0, x - (box.x + box.w))
+    dy = max(box.y - y, 0, y - (box.y + box.h))
+    return (dx * dx + dy * dy) ** 0.5
+
+def center(box: TextBox):
+    """Click point of a box."""
+    return box.x + box.w / 2, box.y + box.h / 2
+
+
+class TextIndex:
+    """OCR boxes indexed by position (uniform grid) and by normalized text."""
+
+    def __init__(self, boxes=(), cell: int = CELL):
+        self.cell = cell
+        self.boxes = {}      # id -> TextBox
+        self.grid = {}       # (col, row) -> set of ids
+        self.by_text = {}    # normalized text -> set of ids
+        self.fuzzy = {}      # one-deletion variant -> set of normalized texts
+        self._next_id = 0
+        for box in boxes:
+            self.add(box)
+
+    # --- maintenance ------------------------------------------------------
+
+    def _cells(self, x, y, w, h):
+        c0, r0 = int(x // self.cell), int(y // self.cell)
+        c1, r1 = int((x + max(w, 1) - 1) // self.cell), int((y + max(h, 1) - 1) // self.cell)
+        return [(c, r) for c in range(c0, c1 + 1) for r in range(r0, r1 + 1)]
+
+    def add(self, box) -> int:
+        """Indexes one (text, x, y, w, h, conf) box; returns its id."""
+        box = TextBox(*box)
+        box_id = self._next_id
+        self._next_id += 1
+        self.boxes[box_id] = box
+        for cell in self._cells(box.x, box.y, box.w, box.h):
+            self.grid.setdefault(cell, set()).add(box_id)
+        key = normalize(box.text)
+        if key not in self.by_text:
+            self.by_text[key] = set()
+            for variant in _deletions(key) | {key}:
+                self.fuzzy.setdefault(variant, set()).add(key)
+        self.by_text[key].add(box_id)
+        return box_id
+
+    def remove(self, box_id: int):
+        box = self.boxes.pop(box_id)
+        for cell in self._cells(box.x, box.y, box.w, box.h):
+            ids = self.grid[cell]
+            ids.discard(box_id)
+            if not ids:
+                del self.grid[cell]
+        key = normalize(box.text)
+        ids = self.by_text[key]
+        ids.discard(box_id)
+        if not ids:
+            del self.by_text[key]
+            for variant in _deletions(key) | {key}:
+                keys = self.fuzzy[variant]
+                keys.discard(key)
+                if not keys:
+                    del self.fuzzy[variant]
+
+    def replace_region(self, rect, boxes):
+        """
+        Incremental update after re-OCRing only rect = (x, y, w, h): boxes centred
+        inside rect are dropped and the new boxes (frame coordinates) added.
+        """
+        x, y, w, h = rect
+        for box_id in self._ids_in(rect):
+            cx, cy = center(self.boxes[box_id])
+            if x <= cx < x + w and y <= cy < y + h:
+                self.remove(box_id)
+        for box in boxes:
+            self.add(box)
+
+    # --- queries ----------------------------------------------------------
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __iter__(self):
+        return iter(self.boxes.values())
+
+    def _ids_in(self, rect):
+        ids = set()
+        for cell in self._cells(*rect):
+            ids |= self.grid.get(cell, set())
+        return ids
+
+    def within(self, x, y, w, h, fully: bool = False):
+        """Boxes overlapping (or, with fully, contained in) the rectangle, top-to-bottom, left-to-right."""
+        found = []
+        for box_id in self._ids_in((x, y, w, h)):
+            b = self.boxes[box_id]
+            if fully:
+                hit = b.x >= x and b.y >= y and b.x + b.w <= x + w and b.y + b.h <= y + h
+            else:
+                hit = b.x < x + w and b.x + b.w > x and b.y < y + h and b.y + b.h > y
+            if hit:
+                found.append(b)
+        return sorted(found, key=lambda b: (b.y, b.x))
+
+    def nearest(self, x, y, k: int = 1, max_distance: float = float("inf")):
+        """The k boxes closest to point (x, y), searching outward ring by ring of grid cells."""
+        if not self.boxes:
+            return []
+        col, row = int(x // self.cell), int(y // self.cell)
+        cols = [c for c, _ in self.grid]
+        rows = [r for _, r in self.grid]
+        min_col, max_col, min_row, max_row = min(cols), max(cols), min(rows), max(rows)
+        # Rings closer than the occupied cells are empty: start at the first one that reaches them
+        first = max(min_col - col, col - max_col, min_row - row, row - max_row, 0)
+        last = max(col - min_col, max_col - col, row - min_row, max_row - row)
+        seen = set()
+        best = []
+        for ring in range(first, last + 1):
+            # Every box in this ring or beyond is at least (ring - 1) * cell away
+            if ring > 0 and (ring - 1) * self.cell > max_distance:
+                break
+            for cell in self._ring(col, row, ring, min_col, max_col, min_row, max_row):
+                for box_id in self.grid.get(cell, ()):
+                    if box_id not in seen:
+                        seen.add(box_id)
+                        best.append((_rect_distance(self.boxes[box_id], x, y), box_id))
+            best.sort()
+            # Anything in a further ring is at least ring * cell away
+            if len(best) >= k and best[k - 1][0] <= ring * self.cell:
+                break
+        return [self.boxes[i] for d, i in best[:k] if d <= max_distance]
+
+    @staticmethod
+    def _ring(col, row, ring, min_col, max_col, min_row, max_row):
+        """The cells on the edge of the square ring around (col, row), clipped to the occupied range."""
+        if ring == 0:
+            return [(col, row)]
+        c0, c1 = max(col - ring, min_col), min(col + ring, max_col)
+        r0, r1 = max(row - ring + 1, min_row), min(row + ring - 1, max_row)
+        cells = []
+        for r in (row - ring, row + ring):
+            if min_row <= r <= max_row:
+                cells.extend((c, r) for c in range(c0, c1 + 1))
+        for c in (col - ring, col + ring):
+            if min_col <= c <= max_col:
+                cells.extend((c, r) for r in range(r0, r1 + 1))
+        return cells
+
+    def _keys(self, key: str, max_distance: int):
+        """(distance, indexed text) pairs within max_distance edits of key."""
+        if max_distance == 0:
+            return [(0, key)] if key in self.by_text else []
+        if max_distance == 1:
+            candidates = set()
+            for variant in _deletions(key) | {key}:
+                candidates |= self.fuzzy.get(variant, set())
+        else:
+            candidates = self.by_text.keys()
+        scored = [(edit_distance(key, c, max_distance), c) for c in candidates]
+        return [(d, c) for d, c in scored if d <= max_distance]
+
+    def _phrase(self, first: TextBox, rest, max_distance: int):
+        """Extends a first-word box with the following words on the same line, or None."""
+        box = first
+        for word in rest:
+            line = self.within(box.x + box.w, box.y, box.h * 3, box.h)
+            nxt = next((b for b in sorted(line, key=lambda b: b.x)
+                        if b.x >= box.x + box.w - 1
+                        and edit_distance(normalize(b.text), word, max_distance) <= max_distance), None)
+            if nxt is None:
+                return None
+            right, bottom = max(box.x + box.w, nxt.x + nxt.w), max(box.y + box.h, nxt.y + nxt.h)
+            top = min(box.y, nxt.y)
+            box = TextBox(f"{box.text} {nxt.text}", box.x, top, right - box.x, bottom - top, min(box.conf, nxt.conf))
+        return box
+
+    def find(self, label: str, max_distance: int = 0):
+        """
+        Boxes whose text matches label (case/punctuation-insensitive, up to max_distance
+        edits per word). Multi-word labels ("FULL HOUSE") are matched across consecutive
+        words on one line and returned as one merged box. Closest spellings come first.
+        """
+        words = [normalize(w) for w in label.split()]
+        words = [w for w in words if w]
+        if not words:
+            return []
+        found = []
+        for distance, key in self._keys(words[0], max_distance):
+            for box_id in self.by_text[key]:
+                box = self._phrase(self.boxes[box_id], words[1:], max_distance)
+                if box is not None:
+                    found.append((distance, box))
+        found.sort(key=lambda item: (item[0], item[1].y, item[1].x))
+        return [box for _, box in found]
+
+    def locate(self, label: str, max_distance: int = 0):
+        """Click point (x, y) of the best (closest spelling) match for label, or None."""
+        matches = self.find(label, max_distance)
+        return center(matches[0]) if matches else None
@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from game_state import CATEGORIES, CATEGORY_INDEX, NUM_CATEGORIES, GameState
+
+# Append-only turn log for post-game analysis.
+#
+# Every turn is one fixed-width record (TURN_DTYPE): what the bot saw (dice,
+# scoreboard), what it decided (hold mask or category and points) and how long
+# the stages took. Each TurnRecorder opened on a log is a new run (run id =
+# last run + 1), so sessions and games numbered from 0 by every run never
+# merge with an earlier run's. Records are filled into a preallocated NumPy buffer and
+# written in chunks, so recording a turn is a few field stores. The log is raw
+# records with a small JSON header next to it (<path>.json), so any number of
+# turns loads back as a read-only memory map for vectorized analysis.
+#
+# Optional ROI snapshots go to <path>.snap (raw pixels) with an index in
+# <path>.snapidx; identical images are stored once, keyed by a SHA-1 of the
+# pixels (hardware-accelerated, about twice as fast as blake2b on a large ROI).
+
+VERSION = 2
+CHUNK_SIZE = 4096
+
+# Stage timings kept per turn (ms; NaN when the stage did not run)
+TIMING_SPANS = ("capture", "preprocess", "ocr", "detection.dice", "detection.scoreboard", "decision")
+
+TURN_DTYPE = np.dtype([
+    ("time", "<f8"),                     # unix seconds
+    ("run", "<u2"),                      # one per TurnRecorder opened on the log
+    ("session", "<u2"),
+    ("game", "<u4"),
+    ("dice", "u1", 5),                   # 0 = empty/unread slot
+    ("rolls_left", "i1"),                # -1 = unknown
+    ("open_mask", "<u2"),                # scoreboard before the decision
+    ("scores", "<i2", NUM_CATEGORIES),   # -1 = not filled in
+    ("hold", "i1"),                      # bit i = die i held; -1 = no hold decision
+    ("category", "i1"),                  # index into CATEGORIES; -1 = none
+    ("points", "<i2"),
+    ("timings_ms", "<f4", len(TIMING_SPANS)),
+    ("snapshot", "<i4"),                 # snapshot id; -1 = none
+])
+
+SNAPSHOT_DTYPE = np.dtype([
+    ("digest", "V16"),
+    ("offset", "<u8"),
+    ("shape", "<u2", 3),                 # height, width, channels
+])
+
+
+def _header(path: str) -> str:
+    return f"{path}.json"
+
+def _complete_records(path: str, dtype: np.dtype) -> int:
+    return os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+
+def _trim(path: str, dtype: np.dtype):
+    """Cuts a partially written last record (a run killed mid-write) so appends stay aligned."""
+    if os.path.exists(path):
+        size = _complete_records(path, dtype) * dtype.itemsize
+        if os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+
+class SnapshotStore:
+    """Append-only, content-deduplicated store of uint8 images (ROI crops)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f"{path}idx"
+        _trim(self.index_path, SNAPSHOT_DTYPE)
+        index = np.fromfile(self.index_path, SNAPSHOT_DTYPE) if os.path.exists(self.index_path) else \
+            np.zeros(0, SNAPSHOT_DTYPE)
+        # Entries whose pixels never reached the blob (a crash between the two writes) are dropped
+        ends = index["offset"].astype(np.int64) + np.prod(index["shape"].astype(np.int64), axis=1)
+        stored = ends <= (os.path.getsize(path) if os.path.exists(path) else 0)
+        if not stored.all():
+            kept = int(np.argmin(stored))
+            index, ends = index[:kept], ends[:kept]
+            os.truncate(self.index_path, kept * SNAPSHOT_DTYPE.itemsize)
+        self.ids = {bytes(d): i for i, d in enumerate(index["digest"])}
+        self._blob = open(path, "ab")
+        # Pixels past the last indexed snapshot belong to a torn write; they are overwritten
+        end = int(ends[-1]) if len(index) else 0
+        self._blob.truncate(end)
+        self._blob.seek(end)
+        self._index = open(self.index_path, "ab")
+        self._lock = threading.Lock()
+
+    def add(self, image: np.ndarray) -> int:
+        """Id of image in the store, writing it only if these exact pixels are new."""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        digest = hashlib.sha1(image.data)
+        digest.update(str(image.shape).encode())
+        digest = digest.digest()[:16]
+        with self._lock:
+            snapshot_id = self.ids.get(digest)
+            if snapshot_id is not None:
+                return snapshot_id
+            entry = np.zeros(1, SNAPSHOT_DTYPE)
+            entry["digest"] = np.void(digest)
+            entry["offset"] = self._blob.tell()
+            entry["shape"] = image.shape if image.ndim == 3 else (*image.shape, 1)
+            # Pixels first: an index entry is only ever written after the image it points to
+            self._blob.write(image.data)
+            self._blob.flush()
+            self._index.write(entry.tobytes())
+            snapshot_id = self.ids[digest] = len(self.ids)
+            return snapshot_id
+
+    def flush(self):
+        with self._lock:
+            self._blob.flush()
+            self._index.flush()
+
+    def close(self):
+        self._blob.close()
+        self._index.close()
+
+
+class TurnRecorder:
+    """
+    Appends turns to path as a new run. record() fills one row of the in-memory chunk;
+    full chunks are written with one call. Thread-safe, so sessions can share a recorder.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, snapshots: bool = False):
+        self.path = path
+        header = {"version": VERSION, "dtype": TURN_DTYPE.descr, "spans": list(TIMING_SPANS),
+                  "categories": CATEGORIES}
+        if os.path.exists(_header(path)):
+            with open(_header(path)) as f:
+                existing = json.load(f)
+            if json.dumps(existing["dtype"]) != json.dumps(header["dtype"]):
+                raise ValueError(f"{path} was written with a different record layout")
+        else:
+            with open(_header(path), "w") as f:
+                json.dump(header, f)
+        _trim(path, TURN_DTYPE)
+
+        self._file = open(path, "ab")
+        self._buffer = np.zeros(chunk_size, TURN_DTYPE)
+        self._count = 0
+        self._lock = threading.Lock()
+        self.snapshots = SnapshotStore(f"{path}.snap") if snapshots else None
+        self.turns = _complete_records(path, TURN_DTYPE)
+        self.run = int(load_turns(path)["run"].max()) + 1 if self.turns else 0
+        if self.run > np.iinfo(TURN_DTYPE["run"]).max:
+            raise ValueError(f"{path} already holds the maximum number of runs")
+
+    def record(self, dice=(), scoreboard=None, category=None, points: int = 0, hold=None,
+               rolls_left: int = -1, timings=None, game: int = 0, session: int = 0, snapshot=None) -> int:
+        """
+        Records one turn and returns its row number.
+        scoreboard: GameState or extract_scoreboard dict. category: name or index.
+        hold: five booleans. timings: {span: ms} or the "spans" of metrics.snapshot().
+        snapshot: optional ROI image, stored once per distinct content.
+        """
+        state = scoreboard if isinstance(scoreboard, GameState) or scoreboard is None \
+            else GameState.from_scoreboard(scoreboard)
+        snapshot_id = self.snapshots.add(snapshot) if snapshot is not None and self.snapshots else -1
+
+        with self._lock:
+            row = self._buffer[self._count]
+            row["time"] = time.time()
+            row["run"] = self.run
+            row["session"] = session
+            row["game"] = game
+            dice = list(dice)[:5]
+            row["dice"] = dice + [0] * (5 - len(dice))
+            row["rolls_left"] = rolls_left
+            if state is not None:
+                row["open_mask"] = state.open_mask
+                row["scores"] = state.scores
+            else:
+                row["open_mask"] = 0
+                row["scores"] = -1
+            row["hold"] = sum(1 << i for i, h in enumerate(hold) if h) if hold is not None else -1
+            row["category"] = CATEGORY_INDEX[category] if isinstance(category, str) else \
+                (-1 if category is None else category)
+            row["points"] = points
+            row["timings_ms"] = [_ms(timings, span) for span in TIMING_SPANS] if timings else np.nan
+            row["snapshot"] = snapshot_id
+
+            self._count += 1
+            number = self.turns
+            self.turns += 1
+            if self._count == len(self._buffer):
+                self._write()
+        return number
+
+    def append(self, records: np.ndarray):
+        """Appends a block of TURN_DTYPE records built elsewhere (e.g. by the simulator) to this run."""
+        records = np.array(records, TURN_DTYPE)
+        records["run"] = self.run
+        with self._lock:
+            self._write()
+            self._file.write(records.tobytes())
+            self.turns += len(records)
+
+    def _write(self):
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self._count = 0
+
+    def flush(self):
+        """Writes buffered turns to the file."""
+        with self._lock:
+            self._write()
+            self._file.flush()
+        if self.snapshots:
+            self.snapshots.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        if self.snapshots:
+            self.snapshots.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _ms(timings: dict, span: str) -> float:
+    value = timings.get(span)
+    if value is None:
+        return np.nan
+    return value["total_ms"] if isinstance(value, dict) else value
+
+
+# -------------------------------------------------------
+# Analysis
+
+def load_turns(path: str) -> np.ndarray:
+    """Every complete turn in path as a read-only memory-mapped TURN_DTYPE array."""
+    with open(_header(path)) as f:
+        dtype = np.dtype([tuple(field) for field in json.load(f)["dtype"]])
+    count = _complete_records(path, dtype)
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+def load_snapshot(path: str, snapshot_id: int) -> np.ndarray:
+    """The ROI snapshot a turn refers to (turn["snapshot"]), as a read-only array."""
+    index = np.memmap(f"{path}.snapidx", dtype=SNAPSHOT_DTYPE, mode="r")
+    entry = index[snapshot_id]
+    height, width, channels = (int(v) for v in entry["shape"])
+    image = np.memmap(f"{path}.snap", dtype=np.uint8, mode="r", offset=int(entry["offset"]),
+                      shape=(height, width, channels))
+    return image[:, :, 0] if channels == 1 else image
+
+def game_scores(turns: np.ndarray) -> np.ndarray:
+    """Points per (run, session, game): the sum of points of every scored turn."""
+    keys = (turns["run"].astype(np.uint64) << np.uint64(48)) | (turns["session"].astype(np.uint64) << np.uint64(32)) \
+        | turns["game"].astype(np.uint64)
+    _, game = np.unique(keys, return_inverse=True)
+    return np.bincount(game, weights=turns["points"]).astype(np.int64)
+
+def summarize(turns: np.ndarray) -> dict:
+    """Turn and game counts, score distribution, category use and per-span latency percentiles."""
+    scored = turns[turns["category"] >= 0]
+    scores = game_scores(scored) if len(scored) else np.zeros(0, np.int64)
+    categories = np.bincount(scored["category"], minlength=NUM_CATEGORIES) if len(scored) else \
+        np.zeros(NUM_CATEGORIES, np.int64)
+    latency = {}
+    timings = turns["timings_ms"]
+    for s, span in enumerate(TIMING_SPANS):
+        column = timings[:, s]
+        column = column[~np.isnan(column)]
+        if len(column):
+            p50, p95 = np.percentile(column, [50, 95])
+            latency[span] = {"p50_ms": float(p50), "p95_ms": float(p95), "max_ms": float(column.max())}
+    summary = {
+        "turns": int(len(turns)),
+        "runs": int(len(np.unique(turns["run"]))),
+        "scored_turns": int(len(scored)),
+        "games": int(len(scores)),
+        "categories": {CATEGORIES[c]: int(n) for c, n in enumerate(categories) if n},
+        "latency": latency,
+    }
+    if len(scores):
+        p5, p50, p95 = np.percentile(scores, [5, 50, 95])
+        summary.update(mean_score=float(scores.mean()), p5_score=float(p5), p50_score=float(p50),
+                       p95_score=float(p95), max_score=int(scores.max()))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a recorded turn log.")
+    parser.add_argument("path", help="Turn log written by TurnRecorder (e.g. turns.bin).")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    turns = load_turns(args.path)
+    stats = summarize(turns)
+    elapsed = time.perf_counter() - start
+
+    print(f"📼 {args.path}: {stats['turns']} turns, {stats['games']} games in {stats['runs']} runs "
+          f"(analysed in {elapsed:.2f}s)")
+    if "mean_score" in stats:
+        print(f"📊 score mean {stats['mean_score']:.1f} | p5 {stats['p5_score']:.0f} "
+              f"p50 {stats['p50_score']:.0f} p95 {stats['p95_score']:.0f} | max {stats['max_score']}")
+    for span, value in stats["latency"].items():
+        print(f"⏱️ {span}: p50 {value['p50_ms']:.2f} ms, p95 {value['p95_ms']:.2f} ms, max {value['max_ms']:.2f} ms")
+    if stats["categories"]:
+        print("🗂️ " + ", ".join(f"{name} {n}" for name, n in stats["categories"].items()))
+
+
+if __name__ == "__main__":
+    main()
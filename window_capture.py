@@ -1,7 +1,22 @@
 # window_capture.py
 
+import glob
 import os
 import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import metrics
+from frame_cache import Frame
+
+try:
+    import mss
+except ImportError:
+    mss = None
 
 def get_window_bounds(app_name: str):
     """
@@ -40,3 +55,140 @@ def capture_region_screenshot(x, y, width, height, output_path="region.png"):
     if proc.returncode == 0 and os.path.exists(output_path):
         return output_path
     return None
+
+def read_image(source):
+    """
+    Returns a BGR numpy image for a file path, or passes an array or Frame (e.g. a frame region) through.
+    Returns None if the file is missing or unreadable.
+    """
+    if isinstance(source, (np.ndarray, Frame)):
+        return source
+    if not os.path.exists(source):
+        return None
+    return cv2.imread(source)
+
+def region_rect(frame_shape, bounds, x, y, width, height):
+    """
+    Pixel rectangle (x, y, w, h) in a window frame for a region given in absolute screen points.
+    bounds is the (x,y,w,h) of the window the frame was grabbed from; Retina scale is derived from it.
+    """
+    win_x, win_y, win_w, win_h = bounds
+    scale = frame_shape[1] / win_w
+    left = max(int(round((x - win_x) * scale)), 0)
+    top = max(int(round((y - win_y) * scale)), 0)
+    return left, top, int(round(width * scale)), int(round(height * scale))
+
+def frame_bounds(frame_shape, origin=(0, 0), scale: float = 2.0):
+    """Window bounds in screen points of a saved frame taken at origin (Retina = 2.0)."""
+    height, width = frame_shape[:2]
+    return (origin[0], origin[1], int(width / scale), int(height / scale))
+
+def crop_region(frame, bounds, x, y, width, height):
+    """
+    Zero-copy view of a region given in absolute screen points (like capture_region_screenshot).
+    A Frame gives back an ROI Frame that shares its preprocessing; an array gives back a slice.
+    """
+    left, top, w, h = region_rect(frame.shape, bounds, x, y, width, height)
+    if isinstance(frame, Frame):
+        return frame.roi(left, top, w, h)
+    return frame[top:top + h, left:left + w]
+
+def list_frames(sources):
+    """Image paths from a file, a directory, a glob pattern or a list of those (sorted per source)."""
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(os.path.join(source, f) for f in os.listdir(source)
+                                if f.lower().endswith((".png", ".jpg", ".jpeg"))))
+        elif os.path.exists(source):
+            paths.append(source)
+        else:
+            paths.extend(sorted(glob.glob(source)))
+    return paths
+
+class ScreenCapture:
+    """
+    Live macOS backend: grabs the whole app window into one numpy frame.
+    Uses mss (in-memory) when installed, otherwise one screencapture call per frame.
+    """
+
+    def __init__(self, app_name: str = "iPhone Mirroring"):
+        self.app_name = app_name
+        self._sct = mss.mss() if mss is not None else None
+
+    def bounds(self):
+        return get_window_bounds(self.app_name)
+
+    @metrics.timed("capture")
+    def grab(self, bounds=None):
+        """BGR frame of the window (or of bounds, in screen points)."""
+        bounds = bounds or self.bounds()
+        if bounds is None:
+            return None
+        x, y, w, h = bounds
+        if self._sct is not None:
+            shot = self._sct.grab({"left": x, "top": y, "width": w, "height": h})
+            return np.asarray(shot)[:, :, :3]
+
+        path = os.path.join(tempfile.gettempdir(), "window_capture_frame.png")
+        if capture_region_screenshot(x, y, w, h, path) is None:
+            return None
+        return cv2.imread(path)
+
+# Decoded replay frames, shared by every ReplayCapture in the process (many
+# sessions replaying one folder decode each screenshot once) and bounded, so a
+# long replay folder does not stay in memory frame by frame.
+REPLAY_CACHE_FRAMES = 16
+
+_decoded = OrderedDict()
+_decoded_lock = threading.Lock()
+
+def _decode(path: str):
+    """cv2.imread(path) through the shared LRU of decoded replay frames."""
+    key = os.path.abspath(path)
+    with _decoded_lock:
+        frame = _decoded.get(key)
+        if frame is not None:
+            _decoded.move_to_end(key)
+            return frame
+    frame = cv2.imread(path)
+    if frame is not None:
+        with _decoded_lock:
+            _decoded[key] = frame
+            while len(_decoded) > REPLAY_CACHE_FRAMES:
+                _decoded.popitem(last=False)
+    return frame
+
+class ReplayCapture:
+    """
+    Replay backend: serves frames from saved screenshots so the pipeline runs on Linux.
+    sources may be a file, a directory, a glob pattern or a list of paths.
+    origin/scale describe the window the screenshots were taken from (Retina = 2.0).
+    """
+
+    def __init__(self, sources, origin=(0, 0), scale: float = 2.0, loop: bool = True):
+        self.paths = list_frames(sources)
+        if not self.paths:
+            raise FileNotFoundError(f"No replay frames found in {sources}")
+        self.origin = origin
+        self.scale = scale
+        self.loop = loop
+        self.position = 0
+        self._current = self.paths[0]
+
+    def bounds(self):
+        """Window bounds in screen points for the current frame."""
+        return frame_bounds(_decode(self._current).shape, self.origin, self.scale)
+
+    @metrics.timed("capture")
+    def grab(self, bounds=None):
+        """Next recorded frame (from the shared decoded-frame cache); None when exhausted."""
+        if self.position >= len(self.paths):
+            if not self.loop:
+                return None
+            self.position = 0
+        self._current = self.paths[self.position]
+        self.position += 1
+        return _decode(self._current)
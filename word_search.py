@@ -1,9 +1,14 @@
 import cv2
-import pytesseract
+import logging
 import os
+from collections import deque, namedtuple
 
-# If Tesseract is not in PATH, set it manually:
-pytesseract.pytesseract.tesseract_cmd = "/opt/homebrew/bin/tesseract"
+import numpy as np
+
+import metrics
+import ocr_engine
+from frame_cache import as_frame
+from window_capture import read_image
 
 DIRECTIONS = [
     (0, 1),   # right →
@@ -16,19 +21,23 @@ DIRECTIONS = [
     (-1, -1)  # up-left ↖
 ]
 
+log = logging.getLogger(__name__)
+
 # -------------------------------------------------------
-def get_clue_words(clue_image_path: str):
-    """Extracts a list of words from the clue image."""
-    if not os.path.exists(clue_image_path):
-        print(f"❌ Missing clue image: {clue_image_path}")
+@metrics.timed("detection.clues")
+def get_clue_words(clue_image_path):
+    """Extracts a list of words from the clue image (file path or numpy frame region)."""
+    if isinstance(clue_image_path, str) and not os.path.exists(clue_image_path):
+        log.error("❌ Missing clue image: %s", clue_image_path)
         return []
 
-    img = cv2.imread(clue_image_path)
+    img = read_image(clue_image_path)
     if img is None:
-        print(f"❌ Could not open {clue_image_path}")
+        log.error("❌ Could not open %s", clue_image_path)
         return []
+    img = as_frame(img).image
 
-    text = pytesseract.image_to_string(img)
+    text = ocr_engine.image_to_string(img)
     words_raw = text.upper().split()
     words = []
     for w in words_raw:
@@ -38,34 +47,156 @@ def get_clue_words(clue_image_path: str):
     return words
 
 # -------------------------------------------------------
-def get_puzzle_grid(grid_image_path: str):
-    """Extracts a structured 2D list of letters from the puzzle image."""
-    if not os.path.exists(grid_image_path):
-        print(f"❌ Missing puzzle image: {grid_image_path}")
-        return []
+# No character whitelist: with one, Tesseract reports 0 confidence for many words
+LETTER_CONFIG = "--psm 6"
+SINGLE_LETTER_CONFIG = "--psm 10"
+INK_LEVEL = 80      # letters are near-black; highlight pills are lighter
+CARD_LEVEL = 235    # the puzzle sits on a white card
+TILE = 96           # montage tile size (px)
+GLYPH = 40          # glyph height inside a tile (px)
 
-    img = cv2.imread(grid_image_path)
-    if img is None:
-        print(f"❌ Could not open {grid_image_path}")
-        return []
+# A plausible letter lattice (anything else falls back to whole-image OCR)
+MIN_LINES = 3           # rows and columns
+PITCH_TOLERANCE = 0.25  # every row/column gap within this share of the median gap, both axes alike
+MIN_FILLED = 0.8        # share of cells holding a glyph
+
+def _centers(values, gap):
+    """1-D clustering: sorted values split wherever consecutive ones are more than gap apart."""
+    order = np.sort(values)
+    splits = np.nonzero(np.diff(order) > gap)[0] + 1
+    return np.array([g.mean() for g in np.split(order, splits)])
+
+def _regular(gaps, pitch):
+    """True if every gap between neighbouring rows (or columns) is close to pitch."""
+    return bool(np.all(np.abs(gaps - pitch) <= PITCH_TOLERANCE * pitch))
+
+def segment_grid(frame):
+    """
+    Locates the letter lattice: letter-sized ink blobs are projected onto each
+    axis and clustered into row and column centres.
+    Returns (ink mask of the card, row centres, column centres, cell pitch), or None
+    if no lattice is found or it is not a regular grid of at least MIN_LINES x MIN_LINES.
+    """
+    frame = as_frame(frame)
+    num, _, stats, _ = cv2.connectedComponentsWithStats(frame.above(CARD_LEVEL), connectivity=4)
+    if num <= 1:
+        return None
+    x, y, w, h = stats[1 + np.argmax(stats[1:, cv2.CC_STAT_AREA]), :4]
+    ink = frame.below(INK_LEVEL)[y:y+h, x:x+w]
+
+    num, _, stats, centroids = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    if not (heights > 10).any():
+        return None
+    letter_h = np.median(heights[heights > 10])
+    letters = (heights > 0.6 * letter_h) & (heights < 1.5 * letter_h) & (widths < 1.5 * letter_h)
+    if letters.sum() < 4:
+        return None
+
+    rows = _centers(centroids[1:][letters, 1], letter_h / 2)
+    cols = _centers(centroids[1:][letters, 0], letter_h / 2)
+    if len(rows) < MIN_LINES or len(cols) < MIN_LINES:
+        log.debug("🔎 Lattice rejected: %d rows x %d columns", len(rows), len(cols))
+        return None
+    row_gaps, col_gaps = np.diff(rows), np.diff(cols)
+    pitch = np.median(np.concatenate([row_gaps, col_gaps]))
+    if not (_regular(row_gaps, pitch) and _regular(col_gaps, pitch)):
+        log.debug("🔎 Lattice rejected: irregular pitch (rows %s, columns %s)",
+                  np.round(row_gaps).tolist(), np.round(col_gaps).tolist())
+        return None
+    return ink, rows, cols, min(np.median(row_gaps), np.median(col_gaps))
+
+def _glyph(ink: np.ndarray, cy: float, cx: float, half: int):
+    """Tight crop of the ink inside one cell (black on white), or None for an empty cell."""
+    cell = ink[max(int(cy) - half, 0):int(cy) + half, max(int(cx) - half, 0):int(cx) + half]
+    ys, xs = np.nonzero(cell)
+    if len(ys) == 0:
+        return None
+    return 255 - cell[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+@metrics.timed("detection.grid")
+def recognize_grid(img):
+    """
+    Cell-segmented grid OCR: every cell is cropped once, all glyphs are laid
+    out on one montage and read with a single OCR call, and words are mapped
+    back to cells by position, so a dropped letter never shifts its row.
+    Returns (grid, confidences) or None if no plausible lattice was found.
+    """
+    segmented = segment_grid(img)
+    if segmented is None:
+        return None
+    ink, rows, cols, pitch = segmented
+    half = int(pitch / 2)
+
+    grid = [[" "] * len(cols) for _ in rows]
+    conf = [[0.0] * len(cols) for _ in rows]
+    montage = np.full((len(rows) * TILE, len(cols) * TILE), 255, dtype=np.uint8)
+    pending = {}
+
+    for i, cy in enumerate(rows):
+        for j, cx in enumerate(cols):
+            glyph = _glyph(ink, cy, cx, half)
+            if glyph is None:
+                continue
+            # A bare vertical bar is an I (Tesseract tends to drop it)
+            if glyph.shape[1] < glyph.shape[0] * 0.25:
+                grid[i][j], conf[i][j] = "I", 90.0
+                continue
+            width = min(max(int(glyph.shape[1] * GLYPH / glyph.shape[0]), 1), TILE - 4)
+            glyph = cv2.resize(glyph, (width, GLYPH), interpolation=cv2.INTER_AREA)
+            top, left = i * TILE + (TILE - GLYPH) // 2, j * TILE + (TILE - width) // 2
+            montage[top:top + GLYPH, left:left + width] = glyph
+            pending[(i, j)] = glyph
+
+    filled = sum(ch != " " for row in grid for ch in row) + len(pending)
+    if filled < MIN_FILLED * len(rows) * len(cols):
+        log.debug("🔎 Lattice rejected: %d of %d cells hold a glyph", filled, len(rows) * len(cols))
+        return None
+
+    # One OCR call for every cell
+    data = ocr_engine.image_to_data(montage, config=LETTER_CONFIG)
+    for text, left, top, width, height, c in zip(
+        data["text"], data["left"], data["top"], data["width"], data["height"], data["conf"]
+    ):
+        text = "".join(ch for ch in str(text).upper() if ch.isalpha())
+        if not text:
+            continue
+        i = min(int((top + height / 2) // TILE), len(rows) - 1)
+        tiles = [j for j in range(left // TILE, min((left + width - 1) // TILE + 1, len(cols))) if (i, j) in pending]
+        # Only trust words that line up one letter per inked tile
+        if len(tiles) == len(text):
+            for j, ch in zip(tiles, text):
+                grid[i][j], conf[i][j] = ch, float(c)
+                del pending[(i, j)]
+
+    # Cells the montage pass could not place are read one by one
+    for (i, j), glyph in pending.items():
+        cell = cv2.copyMakeBorder(glyph, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+        single = ocr_engine.image_to_data(cell, config=SINGLE_LETTER_CONFIG)
+        for text, c in zip(single["text"], single["conf"]):
+            text = "".join(ch for ch in str(text).upper() if ch.isalpha())
+            if text:
+                grid[i][j], conf[i][j] = text[0], float(c)
+                break
 
-    # Convert image to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Improve OCR with adaptive thresholding
-    processed = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV, 11, 2
-    )
+    return grid, conf
 
-    text = pytesseract.image_to_string(processed, config="--psm 6")
-    print("🔎 Raw OCR Output of Puzzle Grid:\n", repr(text))  # Debug print
+def _whole_image_grid(img):
+    """Fallback: OCR the grid as one text block and split it into rows."""
+    # Grayscale + adaptive thresholding (shared with other detectors on the same Frame)
+    processed = as_frame(img).adaptive(11, 2)
+
+    text = ocr_engine.image_to_string(processed, config="--psm 6")
+    log.debug("🔎 Raw OCR Output of Puzzle Grid:\n %r", text)
 
     lines = text.split("\n")
     grid = []
 
     # Remove empty lines and non-letter symbols
     lines = [line.strip().upper() for line in lines if line.strip()]
+    if not lines:
+        return grid
     max_cols = max(len(line) for line in lines)
 
     for line in lines:
@@ -73,37 +204,58 @@ def get_puzzle_grid(grid_image_path: str):
         while len(row) < max_cols:
             row.append(" ")  # Fill missing spaces
         grid.append(row)
+    return grid
+
+def get_puzzle_grid(grid_image_path):
+    """Extracts a structured 2D list of letters from the puzzle image (file path or numpy frame region)."""
+    if isinstance(grid_image_path, str) and not os.path.exists(grid_image_path):
+        log.error("❌ Missing puzzle image: %s", grid_image_path)
+        return []
+
+    img = read_image(grid_image_path)
+    if img is None:
+        log.error("❌ Could not open %s", grid_image_path)
+        return []
+
+    recognized = recognize_grid(img)
+    if recognized is None:
+        log.warning("⚠️ Could not segment grid cells, falling back to whole-image OCR.")
+        grid = _whole_image_grid(img)
+    else:
+        grid, _ = recognized
 
-    print("\n📝 Final Parsed Grid:")
-    for row in grid:
-        print(" ".join(row))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("📝 Final Parsed Grid:\n%s", "\n".join(" ".join(row) for row in grid))
 
     return grid
 
 # -------------------------------------------------------
+@metrics.timed("search")
 def find_word_in_grid(grid, word):
-    """Searches for a word in the grid, checking all 8 directions with full debug info."""
+    """Searches for a word in the grid, checking all 8 directions (per-cell trace at DEBUG level)."""
     rows = len(grid)
     if rows == 0:
-        print("⚠️ The puzzle grid is empty! Cannot search words.")
+        log.warning("⚠️ The puzzle grid is empty! Cannot search words.")
         return None
 
     cols = len(grid[0])  # assume rectangular
     if cols == 0:
-        print("⚠️ The puzzle grid has no columns!")
+        log.warning("⚠️ The puzzle grid has no columns!")
         return None
 
     word_len = len(word)
+    # Checked once, so the per-cell trace costs nothing when DEBUG is off
+    trace = log.isEnabledFor(logging.DEBUG)
 
-    # Debug: Print word being searched
-    print(f"\n🔍 Searching for '{word}' in the grid...")
+    if trace:
+        log.debug("🔍 Searching for '%s' in the grid...", word)
 
     for r in range(rows):
         for c in range(cols):
             if grid[r][c] == word[0]:  # potential match start
 
-                # Debug Print: Show position where search starts
-                print(f"   ➡️ Checking '{word}' starting at ({r},{c})")
+                if trace:
+                    log.debug("   ➡️ Checking '%s' starting at (%d,%d)", word, r, c)
 
                 for (dr, dc) in DIRECTIONS:
                     rr, cc = r, c
@@ -127,10 +279,151 @@ def find_word_in_grid(grid, word):
                         found_positions.append((rr, cc))
 
                     if match:
-                        print(f"✅ '{word}' FOUND from {found_positions[0]} to {found_positions[-1]}")
+                        log.info("✅ '%s' FOUND from %s to %s", word, found_positions[0], found_positions[-1])
                         return found_positions  # Return a list of positions
 
-                print(f"❌ '{word}' NOT found starting at ({r},{c}) in any direction.")
+                if trace:
+                    log.debug("❌ '%s' NOT found starting at (%d,%d) in any direction.", word, r, c)
 
-    print(f"🚫 '{word}' not found in puzzle at all.\n")
+    log.info("🚫 '%s' not found in puzzle at all.", word)
     return None
+
+# -------------------------------------------------------
+WordMatch = namedtuple("WordMatch", ["positions", "direction", "mismatches"])
+
+# Four line orientations; reading each line backwards covers the other four directions
+LINE_DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+def grid_lines(grid):
+    """
+    Every row, column and diagonal of the grid as (string, [(r,c), ...], direction).
+    Built once per grid and shared by all words.
+    """
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    lines = []
+    for dr, dc in LINE_DIRECTIONS:
+        starts = set()
+        for r in range(rows):
+            for c in range(cols):
+                # A line starts where the previous cell in this direction is off-grid
+                if not (0 <= r - dr < rows and 0 <= c - dc < cols):
+                    starts.add((r, c))
+        for r, c in sorted(starts):
+            cells = []
+            while 0 <= r < rows and 0 <= c < cols:
+                cells.append((r, c))
+                r += dr
+                c += dc
+            lines.append(("".join(grid[rr][cc] for rr, cc in cells), cells, (dr, dc)))
+    return lines
+
+class AhoCorasick:
+    """Multi-pattern automaton: one pass over a text reports every pattern occurrence."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for key, pattern in patterns:
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append((key, len(pattern)))
+
+        # Breadth-first failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text):
+        """Yields (key, start index) for every pattern occurrence in text."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for key, length in self.out[state]:
+                yield key, i - length + 1
+
+# Fewest letters a word must match exactly; shorter words are only found exactly
+# (with one mismatch allowed, a two-letter word would match almost anywhere)
+MIN_EXACT_LETTERS = 3
+
+def _pieces(target: str, count: int):
+    """Splits target into count contiguous pieces as (offset, piece)."""
+    edges = [round(i * len(target) / count) for i in range(count + 1)]
+    return [(edges[i], target[edges[i]:edges[i + 1]]) for i in range(count)]
+
+@metrics.timed("search")
+def find_words_in_grid(grid, words, max_mismatches: int = 0):
+    """
+    Finds every clue word in one pass over the grid's direction lines.
+    max_mismatches tolerates that many OCR-substituted letters per word, as long as
+    MIN_EXACT_LETTERS still match (shorter words are matched exactly).
+    Returns {word: [WordMatch(positions, direction, mismatches), ...]} (exact matches first).
+    Raises ValueError for an empty word or a negative max_mismatches.
+    """
+    if max_mismatches < 0:
+        raise ValueError(f"max_mismatches must be >= 0, got {max_mismatches}")
+    if any(not w for w in words):
+        raise ValueError("words must not be empty")
+    results = {w: [] for w in words}
+    if not grid or not grid[0]:
+        log.warning("⚠️ The puzzle grid is empty! Cannot search words.")
+        return results
+
+    # Patterns are (word, reversed?, offset) -> text. With k mismatches allowed,
+    # at least one of k + 1 pieces of the word must match exactly (pigeonhole),
+    # so the pieces are the patterns and every hit is verified in full.
+    allowed = {w: min(max_mismatches, max(len(w) - MIN_EXACT_LETTERS, 0)) for w in results}
+    patterns = []
+    for w in results:
+        for reverse, target in ((False, w), (True, w[::-1])):
+            for offset, piece in _pieces(target, allowed[w] + 1):
+                patterns.append(((w, reverse, offset), piece))
+    automaton = AhoCorasick(patterns)
+
+    seen = set()
+    for text, cells, (dr, dc) in grid_lines(grid):
+        for (w, reverse, offset), found in automaton.search(text):
+            target = w[::-1] if reverse else w
+            start = found - offset
+            if start < 0 or start + len(target) > len(text):
+                continue
+            mismatches = sum(a != b for a, b in zip(text[start:start + len(target)], target))
+            if mismatches > allowed[w]:
+                continue
+
+            positions = cells[start:start + len(target)]
+            direction = (dr, dc)
+            if reverse:
+                positions = positions[::-1]
+                direction = (-dr, -dc)
+            key = (w, frozenset(positions))
+            if key in seen:
+                continue
+            seen.add(key)
+            results[w].append(WordMatch(positions, direction, mismatches))
+
+    for w, matches in results.items():
+        matches.sort(key=lambda m: m.mismatches)
+        if matches:
+            best = matches[0]
+            note = "" if best.mismatches == 0 else f" ({best.mismatches} letter mismatch)"
+            log.info("✅ '%s' FOUND from %s to %s%s", w, best.positions[0], best.positions[-1], note)
+        else:
+            log.info("🚫 '%s' not found in puzzle at all.", w)
+    return results
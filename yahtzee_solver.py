@@ -0,0 +1,186 @@
+import os
+import itertools
+import logging
+from math import factorial
+
+import numpy as np
+
+from game_state import (
+    CATEGORIES, CATEGORY_INDEX, NUM_CATEGORIES, ROLLS, ROLL_INDEX, SCORE_TABLE, GameState
+)
+
+# Exact expected-value solver for solitaire Yahtzee.
+#
+# A game state is (open categories, upper subtotal capped at 63, yahtzee bonus flag).
+# The expected final score of every state is solved once, written to VALUES_PATH
+# and memory-mapped afterwards, so a decision is a handful of table lookups.
+
+YAHTZEE = CATEGORY_INDEX["yahtzee"]
+UPPER_CAP = 63
+UPPER_BONUS = 35
+YAHTZEE_BONUS = 100
+
+log = logging.getLogger(__name__)
+
+VALUES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yahtzee_values.npy")
+
+# All 462 sorted kept subsets (0..5 dice).
+KEEPS = [k for n in range(6) for k in itertools.combinations_with_replacement(range(1, 7), n)]
+KEEP_INDEX = {keep: i for i, keep in enumerate(KEEPS)}
+
+
+def _multiset_probability(dice) -> float:
+    """Probability of rolling exactly this multiset with len(dice) fair dice."""
+    n = len(dice)
+    ways = factorial(n)
+    for face in set(dice):
+        ways //= factorial(dice.count(face))
+    return ways / 6 ** n
+
+
+def _build_tables():
+    """Joker score table, face counts, keep->roll transitions and per-roll hold subsets."""
+    counts = np.array([[r.count(face) for face in range(1, 7)] for r in ROLLS], dtype=np.int64)
+    is_yahtzee = np.array([len(set(r)) == 1 for r in ROLLS])
+
+    # Joker rule: a yahtzee with the yahtzee box filled scores full value in the lower boxes.
+    joker = SCORE_TABLE.copy()
+    joker[is_yahtzee, CATEGORY_INDEX["full_house"]] = 25
+    joker[is_yahtzee, CATEGORY_INDEX["small_straight"]] = 30
+    joker[is_yahtzee, CATEGORY_INDEX["large_straight"]] = 40
+
+    transitions = np.zeros((len(KEEPS), len(ROLLS)), dtype=np.float64)
+    for k, keep in enumerate(KEEPS):
+        for rolled in itertools.combinations_with_replacement(range(1, 7), 5 - len(keep)):
+            roll = tuple(sorted(keep + rolled))
+            transitions[k, ROLL_INDEX[roll]] += _multiset_probability(rolled)
+
+    # For every roll, the keep index of each of the 32 hold masks.
+    holds = np.zeros((len(ROLLS), 32), dtype=np.int16)
+    for r, roll in enumerate(ROLLS):
+        for mask in range(32):
+            keep = tuple(roll[i] for i in range(5) if mask >> i & 1)
+            holds[r, mask] = KEEP_INDEX[keep]
+
+    return joker, counts, is_yahtzee, transitions, holds
+
+
+JOKER_SCORES, COUNTS, IS_YAHTZEE, TRANSITIONS, HOLDS = _build_tables()
+
+
+def category_totals(open_mask: int, uppers: np.ndarray, bonuses: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Points now plus expected points later for every (state, roll, category).
+    uppers/bonuses describe a batch of states sharing open_mask.
+    Returns (batch, 252, 13); categories not in open_mask are -inf.
+    """
+    yahtzee_filled = not open_mask >> YAHTZEE & 1
+    table = JOKER_SCORES if yahtzee_filled else SCORE_TABLE
+    uppers = np.asarray(uppers)[:, None]
+    bonuses = np.asarray(bonuses)[:, None]
+    totals = np.full((len(uppers), len(ROLLS), NUM_CATEGORIES), -np.inf)
+
+    for c in range(NUM_CATEGORIES):
+        if not open_mask >> c & 1:
+            continue
+        rest = values[open_mask & ~(1 << c)]
+        points = table[:, c] + YAHTZEE_BONUS * (bonuses & IS_YAHTZEE)
+
+        if c < 6:
+            # The upper subtotal only depends on how many of this face were rolled.
+            face = c + 1
+            raw = uppers + face * np.arange(6)                      # (batch, 6)
+            crossed = (uppers < UPPER_CAP) & (raw >= UPPER_CAP)
+            future = rest[np.minimum(raw, UPPER_CAP), bonuses] + UPPER_BONUS * crossed
+            totals[:, :, c] = points + future[:, COUNTS[:, c]]
+        elif c == YAHTZEE:
+            # Scoring 50 here arms the yahtzee bonus for the rest of the game.
+            totals[:, :, c] = points + rest[uppers, IS_YAHTZEE.astype(np.int64)]
+        else:
+            totals[:, :, c] = points + rest[uppers, bonuses]
+    return totals
+
+
+def _turn_value(final_values: np.ndarray) -> np.ndarray:
+    """
+    Expected value at the start of a turn, given the value of stopping on each roll.
+    final_values is (batch, 252); returns (batch,).
+    """
+    value = final_values
+    for _ in range(2):
+        keep_values = value @ TRANSITIONS.T              # (batch, 462)
+        value = keep_values[:, HOLDS].max(axis=2)        # (batch, 252)
+    return value @ TRANSITIONS[KEEP_INDEX[()]]
+
+
+def solve(path: str = VALUES_PATH) -> np.ndarray:
+    """
+    Solves every state by backward induction over the open-category mask and
+    writes the (8192, 64, 2) float32 value table to path.
+    """
+    values = np.zeros((1 << NUM_CATEGORIES, UPPER_CAP + 1, 2), dtype=np.float32)
+    uppers = np.repeat(np.arange(UPPER_CAP + 1), 2)
+    bonuses = np.tile(np.arange(2), UPPER_CAP + 1)
+
+    # Removing a category always yields a smaller mask, so ascending order is enough.
+    for open_mask in range(1, 1 << NUM_CATEGORIES):
+        finals = category_totals(open_mask, uppers, bonuses, values).max(axis=2)
+        values[open_mask, uppers, bonuses] = _turn_value(finals)
+
+        if open_mask % 1024 == 0:
+            log.info("🧮 Solved %d/%d category masks", open_mask, 1 << NUM_CATEGORIES)
+
+    np.save(path, values)
+    log.info("💾 Wrote Yahtzee value table to %s", path)
+    return values
+
+
+_values = None
+
+
+def load_values(path: str = VALUES_PATH) -> np.ndarray:
+    """Memory-maps the solved value table, solving it first if the file is missing."""
+    global _values
+    if _values is None:
+        if not os.path.exists(path):
+            solve(path)
+        _values = np.load(path, mmap_mode="r")
+    return _values
+
+
+def state_from_scoreboard(scoreboard_data):
+    """Returns (open_mask, upper_subtotal, yahtzee_bonus) from a GameState or an extract_scoreboard dict."""
+    state = scoreboard_data if isinstance(scoreboard_data, GameState) else GameState.from_scoreboard(scoreboard_data)
+    return state.open_mask, min(state.upper_subtotal, UPPER_CAP), state.yahtzee_bonus
+
+
+def best_category(dice_values, open_mask: int, upper: int, bonus: int):
+    """
+    Picks the open category maximising points now plus expected points later.
+    Returns (category, expected final score from here).
+    """
+    r = ROLL_INDEX[tuple(sorted(dice_values))]
+    totals = category_totals(open_mask, [upper], [bonus], load_values())[0, r]
+    best = int(np.argmax(totals))
+    return CATEGORIES[best], float(totals[best])
+
+
+def awarded_points(dice_values, category, scoreboard_data) -> int:
+    """
+    Points scoring dice in category actually adds under the solver's rules: joker scores once
+    the yahtzee box is filled, plus the yahtzee bonus and the upper bonus when earned.
+    """
+    open_mask, upper, bonus = state_from_scoreboard(scoreboard_data)
+    c = CATEGORY_INDEX[category] if isinstance(category, str) else category
+    r = ROLL_INDEX[tuple(sorted(dice_values))]
+    table = JOKER_SCORES if not open_mask >> YAHTZEE & 1 else SCORE_TABLE
+    points = int(table[r, c]) + YAHTZEE_BONUS * (bonus & int(IS_YAHTZEE[r]))
+    if c < 6 and upper < UPPER_CAP <= upper + int(table[r, c]):
+        points += UPPER_BONUS
+    return points
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    table = solve()
+    print(f"🎯 Expected score of a new game: {table[(1 << NUM_CATEGORIES) - 1, 0, 0]:.2f}")